@@ -0,0 +1,221 @@
+import numpy as np
+import pandas as pd
+
+# The 3x3 alignment grid, row by row from good to evil and, in each row,
+# from lawful to chaotic
+GOOD_EVIL = ("good", "neutral", "evil")
+LAWFUL_CHAOTIC = ("lawful", "neutral", "chaotic")
+CELLS = ["LG", "NG", "CG", "LN", "N", "CN", "LE", "NE", "CE"]
+COLUMNS = CELLS + ["Unaligned"]
+GROUP_LEVELS = ["Type", "Size", "ChallengeRatingInt"]
+# Values of each cell on the good-evil (`Alignment_EG`) and lawful-chaotic
+# (`Alignment_LC`) scales
+EG_VALUES = np.repeat([1, 0, -1], 3)
+LC_VALUES = np.tile([-1, 0, 1], 3)
+
+
+def alignment_distribution(alignment: str) -> np.ndarray:
+    """
+    Returns how an alignment spreads over the alignment grid. Alignments
+    such as "any" or "any evil alignment" are spread uniformly over the
+    cells they allow.
+
+    Parameters
+    ----------
+    alignment : str
+        The alignment, as in the processed data.
+
+    Returns
+    -------
+    np.ndarray
+        An array with the weight of each cell in `CELLS` followed by the
+        weight of "Unaligned", which takes the unaligned monsters and the
+        alignments that are not recognized. The weights add up to 1.
+    """
+    eg = np.repeat(GOOD_EVIL, 3)
+    lc = np.tile(LAWFUL_CHAOTIC, 3)
+    words = alignment.lower().split()
+
+    if words == ["any"] or words == ["any", "alignment"]:
+        mask = np.ones(9, dtype=bool)
+    elif len(words) == 3 and words[0] == "any" and words[2] == "alignment":
+        value = words[1].removeprefix("non-")
+        if value not in GOOD_EVIL + LAWFUL_CHAOTIC:
+            mask = np.zeros(9, dtype=bool)
+        elif words[1].startswith("non-"):
+            mask = (eg != value) & (lc != value)
+        else:
+            mask = (eg == value) | (lc == value)
+    elif words == ["neutral"]:
+        mask = (eg == "neutral") & (lc == "neutral")
+    elif len(words) == 2 and words != ["neutral", "neutral"]:
+        mask = (lc == words[0]) & (eg == words[1])
+    else:
+        mask = np.zeros(9, dtype=bool)
+
+    if not mask.any():
+        return np.eye(10)[-1]
+    return np.append(mask / mask.sum(), 0)
+
+
+def alignment_means(alignment: str) -> tuple:
+    """
+    Returns the position of an alignment on the good-evil and
+    lawful-chaotic scales: the mean of the values of the cells it spreads
+    over (see `alignment_distribution`). For example, "any" is (0, 0) and
+    "any non-good alignment" is (-0.5, 0).
+
+    Parameters
+    ----------
+    alignment : str
+        The alignment, as in the processed data.
+
+    Returns
+    -------
+    tuple
+        The `Alignment_EG` and `Alignment_LC` values, NaN for unaligned
+        monsters and alignments that are not recognized.
+    """
+    mask = alignment_distribution(alignment)[:9] > 0
+    if not mask.any():
+        return np.nan, np.nan
+    # The cells are weighted equally, so the means of the integer values
+    # are exact (e.g. 0 rather than 1e-17 for "any")
+    return float(EG_VALUES[mask].mean()), float(LC_VALUES[mask].mean())
+
+
+class AlignmentHistograms:
+    """
+    Alignment histograms of groups of monsters.
+
+    The histograms are computed in one pass for the finest groups (Type,
+    Size and Challenge Rating), and the histograms of any coarser grouping
+    are sums of those, so no grouping needs to go back to the monsters.
+
+    Parameters
+    ----------
+    table : pd.DataFrame
+        The histograms, indexed by `GROUP_LEVELS` and with the columns in
+        `COLUMNS`.
+    """
+    def __init__(self, table: pd.DataFrame):
+        self.table = table
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> "AlignmentHistograms":
+        """
+        Computes the histograms of a data frame.
+
+        Parameters
+        ----------
+        df : pd.DataFrame
+            The data, as returned by `read_data`.
+
+        Returns
+        -------
+        AlignmentHistograms
+            The histograms.
+        """
+        alignment_codes, alignments = pd.factorize(df["Alignment"])
+        distributions = np.array(
+            [alignment_distribution(a) for a in alignments]).reshape(-1, 10)
+        group_codes, groups = pd.MultiIndex.from_frame(
+            df[GROUP_LEVELS]).factorize()
+
+        # Count each (group, alignment) pair, then spread the alignments
+        n_alignments = len(alignments)
+        counts = np.bincount(
+            group_codes * n_alignments + alignment_codes,
+            minlength=len(groups) * n_alignments,
+        ).reshape(len(groups), n_alignments)
+        table = pd.DataFrame(counts @ distributions,
+                             index=groups.set_names(GROUP_LEVELS),
+                             columns=COLUMNS)
+        return cls(table.sort_index())
+
+    def grouped(self, by=None) -> pd.DataFrame:
+        """
+        Returns the histograms of a grouping.
+
+        Parameters
+        ----------
+        by : str, list or array-like, optional
+            One or more of `GROUP_LEVELS`, or labels for the rows of `table`
+            (see `cr_bands`). All the monsters form one group if omitted.
+
+        Returns
+        -------
+        pd.DataFrame
+            The histogram of each group, with the columns in `COLUMNS`.
+        """
+        if by is None:
+            return self.table.sum().to_frame("All").T
+        if isinstance(by, (str, list)):
+            return self.table.groupby(level=by).sum()
+        return self.table.groupby(np.asarray(by)).sum()
+
+    def mean(self, by=None) -> pd.DataFrame:
+        """
+        Returns the mean alignment of each group.
+
+        Parameters
+        ----------
+        by : str, list or array-like, optional
+            The grouping (see `grouped`).
+
+        Returns
+        -------
+        pd.DataFrame
+            The `Alignment_EG` and `Alignment_LC` means (NaN for groups
+            without aligned monsters) and the `Count` of aligned monsters.
+        """
+        cells = self.grouped(by)[CELLS]
+        values = cells.to_numpy()
+        count = values.sum(axis=1)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            eg = values @ EG_VALUES / count
+            lc = values @ LC_VALUES / count
+        return pd.DataFrame(
+            {"Alignment_EG": eg, "Alignment_LC": lc, "Count": count},
+            index=cells.index)
+
+    def heatmaps(self, by=None) -> dict:
+        """
+        Returns the alignment heatmap of each group.
+
+        Parameters
+        ----------
+        by : str, list or array-like, optional
+            The grouping (see `grouped`).
+
+        Returns
+        -------
+        dict
+            A 3x3 array for each group with the fraction of its aligned
+            monsters in each cell (rows from good to evil, columns from
+            lawful to chaotic). Groups without aligned monsters are omitted.
+        """
+        cells = self.grouped(by)[CELLS]
+        return {
+            key: (row / row.sum()).reshape(3, 3)
+            for key, row in zip(cells.index, cells.to_numpy())
+            if row.sum() > 0}
+
+    def cr_bands(self, edges: list) -> np.ndarray:
+        """
+        Returns Challenge Rating band labels for the rows of `table`, to be
+        used as the grouping of `grouped`, `mean` or `heatmaps`.
+
+        Parameters
+        ----------
+        edges : list
+            The positions in `Config.CHALLENGE_RATINGS` where each band
+            starts, e.g. `[0, 5, 11, 17]`.
+
+        Returns
+        -------
+        np.ndarray
+            The index of the band of each row.
+        """
+        cr = self.table.index.get_level_values("ChallengeRatingInt")
+        return np.digitize(cr, edges) - 1
@@ -0,0 +1,246 @@
+import numpy as np
+import pandas as pd
+
+from config import Config
+from records import SPEED_COLUMNS
+
+FEATURES = list(Config.ABILITIES) + SPEED_COLUMNS + ["SizeInt"]
+TARGET = "ChallengeRatingInt"
+
+
+def feature_matrix(df: pd.DataFrame) -> np.ndarray:
+    """
+    Returns the numeric stats of the monsters used by the models.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        The data, as returned by `read_data`.
+
+    Returns
+    -------
+    np.ndarray
+        An array with one row per monster and one column per feature in
+        `FEATURES` (the Size is encoded by its position in `Config.SIZES`).
+    """
+    X = np.empty((len(df), len(FEATURES)))
+    X[:, :-1] = df[FEATURES[:-1]].to_numpy(dtype=float)
+    X[:, -1] = df["Size"].map(Config.SIZE_TO_INT).to_numpy(dtype=float)
+    return X
+
+
+class Moments:
+    """
+    Running mean, covariance and correlation of the features and the
+    Challenge Rating. Only the sums of the values and of their products are
+    stored, so batches can be added with `partial_fit` at any time.
+    """
+    columns = FEATURES + [TARGET]
+
+    def __init__(self):
+        p = len(self.columns)
+        self.n = 0
+        self.sums = np.zeros(p)
+        self.products = np.zeros((p, p))
+
+    def partial_fit(self, df: pd.DataFrame) -> "Moments":
+        """
+        Adds a batch of monsters.
+
+        Parameters
+        ----------
+        df : pd.DataFrame
+            The batch, as returned by `read_data`.
+
+        Returns
+        -------
+        Moments
+            The updated moments.
+        """
+        Z = np.column_stack([feature_matrix(df),
+                             df[TARGET].to_numpy(dtype=float)])
+        self.n += len(Z)
+        self.sums += Z.sum(axis=0)
+        self.products += Z.T @ Z
+        return self
+
+    @property
+    def mean(self) -> pd.Series:
+        return pd.Series(self.sums / self.n, index=self.columns)
+
+    @property
+    def covariance(self) -> pd.DataFrame:
+        cov = (self.products - np.outer(self.sums, self.sums) / self.n) \
+            / (self.n - 1)
+        return pd.DataFrame(cov, index=self.columns, columns=self.columns)
+
+    @property
+    def correlation(self) -> pd.DataFrame:
+        cov = self.covariance
+        std = np.sqrt(np.diag(cov))
+        # Columns without variance (e.g. a speed nobody has) give NaN
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return cov / np.outer(std, std)
+
+
+class CRRegression:
+    """
+    Linear regressions of the Challenge Rating (as its position in
+    `Config.CHALLENGE_RATINGS`) on the stats in `FEATURES`, one per Type.
+
+    Each Type's coefficients are shrunk towards the pooled regression of all
+    monsters, so Types with few monsters still get sensible fits. The model
+    keeps only the sufficient statistics of each Type, so batches can be
+    added with `partial_fit` and the coefficients are re-solved on demand.
+
+    Parameters
+    ----------
+    shrinkage : float, optional
+        The strength of the pull of each Type's coefficients towards the
+        pooled ones.
+    """
+    def __init__(self, shrinkage: float = 10.0):
+        self.shrinkage = shrinkage
+        p = len(FEATURES) + 1
+        # The last index holds monsters of Types not in the config
+        n_groups = len(Config.MONSTER_TYPES) + 1
+        self.n = np.zeros(n_groups)
+        self.xtx = np.zeros((n_groups, p, p))
+        self.xty = np.zeros((n_groups, p))
+        self.yty = np.zeros(n_groups)
+        self._coefs = None
+
+    @staticmethod
+    def _groups(df: pd.DataFrame) -> np.ndarray:
+        return df["Type"].map(Config.TYPE_TO_INT).fillna(
+            len(Config.MONSTER_TYPES)).to_numpy(dtype=int)
+
+    @staticmethod
+    def _design(df: pd.DataFrame) -> np.ndarray:
+        return np.column_stack([np.ones(len(df)), feature_matrix(df)])
+
+    def partial_fit(self, df: pd.DataFrame) -> "CRRegression":
+        """
+        Adds a batch of monsters to the model.
+
+        Parameters
+        ----------
+        df : pd.DataFrame
+            The batch, as returned by `read_data`.
+
+        Returns
+        -------
+        CRRegression
+            The updated model.
+        """
+        X = self._design(df)
+        y = df[TARGET].to_numpy(dtype=float)
+        groups = self._groups(df)
+
+        for g in np.unique(groups):
+            mask = groups == g
+            Xg, yg = X[mask], y[mask]
+            self.n[g] += len(yg)
+            self.xtx[g] += Xg.T @ Xg
+            self.xty[g] += Xg.T @ yg
+            self.yty[g] += yg @ yg
+        self._coefs = None
+        return self
+
+    def fit(self, df: pd.DataFrame) -> "CRRegression":
+        """
+        Fits the model from scratch.
+
+        Parameters
+        ----------
+        df : pd.DataFrame
+            The data, as returned by `read_data`.
+
+        Returns
+        -------
+        CRRegression
+            The fitted model.
+        """
+        self.__init__(self.shrinkage)
+        return self.partial_fit(df)
+
+    @property
+    def pooled_coefs(self) -> np.ndarray:
+        p = self.xtx.shape[1]
+        # A tiny ridge keeps the system solvable for constant features
+        return np.linalg.solve(self.xtx.sum(axis=0) + 1e-6 * np.eye(p),
+                               self.xty.sum(axis=0))
+
+    @property
+    def coefs(self) -> pd.DataFrame:
+        """
+        The coefficients of each Type (rows) for the intercept and each
+        feature (columns).
+        """
+        if self._coefs is None:
+            pooled = self.pooled_coefs
+            penalty = self.shrinkage * np.eye(len(pooled))
+            self._coefs = np.linalg.solve(
+                self.xtx + penalty,
+                (self.xty + penalty @ pooled)[:, :, None])[:, :, 0]
+        return pd.DataFrame(
+            self._coefs,
+            index=list(Config.MONSTER_TYPES) + ["Other"],
+            columns=["Intercept"] + FEATURES)
+
+    @property
+    def rmse(self) -> float:
+        """
+        The root mean squared residual over all the monsters seen.
+        """
+        b = self.coefs.to_numpy()
+        sse = (self.yty
+               - 2 * np.einsum("gp,gp->g", b, self.xty)
+               + np.einsum("gp,gpq,gq->g", b, self.xtx, b))
+        return float(np.sqrt(max(sse.sum(), 0) / self.n.sum()))
+
+    def predict(self, df: pd.DataFrame) -> np.ndarray:
+        """
+        Predicts the Challenge Rating position of each monster.
+
+        Parameters
+        ----------
+        df : pd.DataFrame
+            The data, as returned by `read_data`.
+
+        Returns
+        -------
+        np.ndarray
+            The predictions.
+        """
+        b = self.coefs.to_numpy()[self._groups(df)]
+        return np.einsum("ip,ip->i", self._design(df), b)
+
+    def score(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Scores the Challenge Rating of each monster against the model.
+
+        Parameters
+        ----------
+        df : pd.DataFrame
+            The data, as returned by `read_data`.
+
+        Returns
+        -------
+        pd.DataFrame
+            The `Name`, `Type`, `ChallengeRating`, the `PredictedCR` (rounded
+            to the closest rating), the `Residual` (in positions of
+            `Config.CHALLENGE_RATINGS`) and its `ZScore`.
+        """
+        predicted = self.predict(df)
+        residual = df[TARGET].to_numpy(dtype=float) - predicted
+        closest = np.clip(np.rint(predicted), 0,
+                          len(Config.CHALLENGE_RATINGS) - 1).astype(int)
+        return pd.DataFrame({
+            "Name": df["Name"].to_numpy(),
+            "Type": df["Type"].to_numpy(),
+            "ChallengeRating": df["ChallengeRating"].to_numpy(),
+            "PredictedCR": np.array(Config.CHALLENGE_RATINGS)[closest],
+            "Residual": residual,
+            "ZScore": residual / self.rmse,
+        }, index=df.index)
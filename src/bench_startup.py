@@ -0,0 +1,91 @@
+import argparse
+import csv
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+CLI = os.path.join(os.path.dirname(os.path.abspath(__file__)), "cli.py")
+# The commands run in a temporary copy of the data, so the ones that write
+# (e.g. `process`) leave the repository untouched
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(CLI)), "data")
+
+
+def _commands(output_dir: str) -> dict:
+    return {
+        "help": ["--help"],
+        "search": ["search", "abolith"],
+        "complete": ["complete", "adult"],
+        "validate": ["validate"],
+        "plots": ["plots", "monster_avg_alignment", "--format", "json",
+                  "--output", output_dir],
+        "process": ["process"],
+        "outliers": ["outliers"],
+        "synth": ["synth", "1000", os.path.join(output_dir, "synthetic.csv")],
+        "pages": ["pages", "--output", os.path.join(output_dir, "pages")],
+    }
+
+
+def time_command(args: list, repeat: int, cwd: str = None) -> list:
+    """
+    Runs a CLI command in fresh interpreters and measures the wall time.
+
+    Parameters
+    ----------
+    args : list
+        The arguments of the CLI.
+    repeat : int
+        The number of runs.
+    cwd : str, optional
+        The working directory of the runs, which holds the `data` directory.
+
+    Returns
+    -------
+    list
+        The wall time of each run in seconds.
+    """
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, CLI] + args, check=True, cwd=cwd,
+                       stdout=subprocess.DEVNULL)
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Measure the cold-start latency of each CLI command.")
+    parser.add_argument("-r", "--repeat", type=int, default=5)
+    parser.add_argument("--history",
+                        help="CSV file to append the results to")
+    args = parser.parse_args()
+
+    rows = []
+    with tempfile.TemporaryDirectory() as output_dir:
+        shutil.copytree(DATA_DIR, os.path.join(output_dir, "data"))
+        for name, cmd in _commands(output_dir).items():
+            times = time_command(cmd, args.repeat, output_dir)
+            rows.append({
+                "Timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "Command": name,
+                "Median": round(statistics.median(times), 4),
+                "Min": round(min(times), 4),
+            })
+            print(f"{name:<10} median {rows[-1]['Median']:.3f} s, "
+                  f"min {rows[-1]['Min']:.3f} s")
+
+    if args.history:
+        new_file = not os.path.exists(args.history)
+        with open(args.history, "a", newline="") as file:
+            writer = csv.DictWriter(file, fieldnames=list(rows[0]))
+            if new_file:
+                writer.writeheader()
+            writer.writerows(rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,290 @@
+import argparse
+import base64
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+from data import add_derived_columns, read_data
+from paths import GOLDEN_DIR
+from plots import FIGURES, prepare_data
+from sinks import atomic_write, fig_to_html
+from synthetic import BestiaryModel
+
+SYNTHETIC_SEED = 42
+# Size of the synthetic bestiary stored in the snapshots, and the sizes
+# rendered to fit the scaling curves
+SNAPSHOT_SIZE = 1000
+SCALING_SIZES = (250, 1000, 4000)
+# The largest exponent of the output size and of the generation time in the
+# number of monsters, i.e. anything worse than linear fails
+MAX_EXPONENT = 1.15
+
+# Budgets of each figure on the SRD data: generation and serialization time,
+# peak memory traced while generating and serializing, and HTML size
+BUDGETS = {
+    "monster_cr": {"seconds": 1.0, "megabytes": 40, "kilobytes": 80},
+    "monster_cr_by_type": {"seconds": 1.0, "megabytes": 40,
+                           "kilobytes": 80},
+    "monster_cr_by_size": {"seconds": 1.0, "megabytes": 40,
+                           "kilobytes": 80},
+    "monster_abilities_radar": {"seconds": 1.0, "megabytes": 40,
+                                "kilobytes": 120},
+    "monster_avg_alignment": {"seconds": 0.5, "megabytes": 40,
+                              "kilobytes": 30},
+    "monster_alignment_heatmap": {"seconds": 0.5, "megabytes": 40,
+                                  "kilobytes": 20},
+}
+
+
+def _typed_array_length(value: dict) -> int:
+    # Plotly serializes numeric arrays as base64 typed arrays
+    # (`{"dtype": "i2", "bdata": "..."}`), with a `shape` when they have
+    # more than one dimension
+    if "shape" in value:
+        shape = value["shape"]
+        if isinstance(shape, str):
+            shape = [int(n) for n in shape.split(",")]
+        return int(shape[0]) if isinstance(shape, (list, tuple)) \
+            else int(shape)
+    n_bytes = len(base64.b64decode(value["bdata"]))
+    return n_bytes // np.dtype(value["dtype"]).itemsize
+
+
+def _lengths(value, prefix: str, out: dict) -> None:
+    # Records the length of every array in a (nested) trace or layout item
+    if isinstance(value, dict) and "bdata" in value:
+        out[prefix[:-1]] = _typed_array_length(value)
+    elif isinstance(value, dict):
+        for key in sorted(value):
+            _lengths(value[key], f"{prefix}{key}.", out)
+    elif isinstance(value, (list, tuple, np.ndarray)):
+        out[prefix[:-1]] = len(value)
+
+
+def summarize(fig) -> dict:
+    """
+    Returns the structure of a figure: the type, mode and array lengths of
+    each trace and the keys, shapes, annotations and dropdowns of the
+    layout. The values themselves and the Plotly template are left out, so
+    the summary does not change with the version of Plotly.
+
+    Parameters
+    ----------
+    fig : go.Figure
+        The figure.
+
+    Returns
+    -------
+    dict
+        The summary, which can be serialized to JSON.
+    """
+    spec = fig.to_plotly_json()
+    traces = []
+    for trace in spec["data"]:
+        lengths = {}
+        _lengths(trace, "", lengths)
+        traces.append({"type": trace.get("type"), "mode": trace.get("mode"),
+                       "lengths": lengths})
+    layout = spec["layout"]
+    return {
+        "traces": traces,
+        "layout": sorted(key for key in layout if key != "template"),
+        "shapes": len(layout.get("shapes", ())),
+        "annotations": len(layout.get("annotations", ())),
+        "buttons": [len(menu.get("buttons", ()))
+                    for menu in layout.get("updatemenus", ())],
+    }
+
+
+def compare(golden, actual, path: str = "") -> list:
+    """
+    Lists the differences between two summaries.
+
+    Parameters
+    ----------
+    golden, actual
+        The stored and the new summaries (or parts of them).
+    path : str, optional
+        The location of the parts being compared.
+
+    Returns
+    -------
+    list
+        A description of each difference.
+    """
+    if isinstance(golden, dict) and isinstance(actual, dict):
+        diffs = []
+        for key in sorted(golden.keys() | actual.keys()):
+            diffs += compare(golden.get(key), actual.get(key),
+                             f"{path}/{key}")
+        return diffs
+    if isinstance(golden, list) and isinstance(actual, list) \
+            and len(golden) == len(actual):
+        diffs = []
+        for i, (g, a) in enumerate(zip(golden, actual)):
+            diffs += compare(g, a, f"{path}/{i}")
+        return diffs
+    if golden != actual:
+        return [f"{path or '/'}: {golden!r} -> {actual!r}"]
+    return []
+
+
+def measure(func, df, repeat: int = 1, memory: bool = True) -> dict:
+    """
+    Generates a figure and serializes it to HTML.
+
+    Parameters
+    ----------
+    func : callable
+        The generator of the figure.
+    df : pd.DataFrame
+        The data to plot, as returned by `prepare_data`.
+    repeat : int, optional
+        The number of timed runs. The fastest is kept.
+    memory : bool, optional
+        If False, skip the measurement of the memory.
+
+    Returns
+    -------
+    dict
+        The `figure`, its HTML size in `bytes`, the generation `seconds` and
+        the peak `megabytes` allocated (NaN if not measured).
+    """
+    seconds = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fig = func(df)
+        html = fig_to_html(fig)
+        seconds.append(time.perf_counter() - start)
+
+    # Tracing slows everything down, so memory is measured in its own run
+    peak = np.nan
+    if memory:
+        tracemalloc.start()
+        try:
+            fig_to_html(func(df))
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+    return {"figure": fig, "bytes": len(html.encode("utf-8")),
+            "seconds": min(seconds), "megabytes": peak / 2**20}
+
+
+def scaling_exponent(sizes, values) -> float:
+    """
+    Fits `values ~ sizes ** k` and returns `k`.
+    """
+    return float(np.polyfit(np.log(sizes), np.log(values), 1)[0])
+
+
+def synthetic_data(model: BestiaryModel, n: int):
+    df = model.sample(n, np.random.default_rng(SYNTHETIC_SEED))
+    add_derived_columns(df)
+    return prepare_data(df)
+
+
+def check_figure(name: str, datasets: dict, scaling: dict, repeat: int,
+                 update: bool) -> list:
+    """
+    Runs the checks of a figure.
+
+    Parameters
+    ----------
+    name : str
+        The name of the figure (a key of `FIGURES`).
+    datasets : dict
+        The data of each snapshot, by name. The SRD data is `srd`.
+    scaling : dict
+        The synthetic data of each size in `SCALING_SIZES`. No scaling
+        checks are run if empty.
+    repeat : int
+        The number of timed runs on the SRD data.
+    update : bool
+        If True, rewrite the golden snapshot instead of comparing with it.
+
+    Returns
+    -------
+    list
+        A description of each failure.
+    """
+    func = FIGURES[name]
+    failures = []
+
+    srd = measure(func, datasets["srd"], repeat)
+    budget = BUDGETS.get(name, {})
+    for key, value in (("seconds", srd["seconds"]),
+                       ("megabytes", srd["megabytes"]),
+                       ("kilobytes", srd["bytes"] / 1024)):
+        if key in budget and value > budget[key]:
+            failures.append(f"{key}: {value:.2f} over the budget of "
+                            f"{budget[key]}")
+    print(f"{name:<26} {srd['seconds']:6.3f} s {srd['megabytes']:6.1f} MB "
+          f"{srd['bytes'] / 1024:8.1f} KB")
+
+    summaries = {"srd": summarize(srd["figure"])}
+    for key, df in datasets.items():
+        if key != "srd":
+            summaries[key] = summarize(func(df))
+    path = os.path.join(GOLDEN_DIR, f"{name}.json")
+    if update:
+        atomic_write(path, (json.dumps(summaries, indent=1, sort_keys=True)
+                            + "\n").encode("utf-8"))
+    elif not os.path.exists(path):
+        failures.append(f"no golden snapshot at {path}")
+    else:
+        with open(path, "r") as file:
+            failures += compare(json.load(file), summaries)
+
+    if scaling:
+        runs = [measure(func, df, memory=False) for df in scaling.values()]
+        exponents = {key: scaling_exponent(list(scaling),
+                                           [r[key] for r in runs])
+                     for key in ("bytes", "seconds")}
+        print(f"{'':<26} bytes ~ n^{exponents['bytes']:.2f}, "
+              f"seconds ~ n^{exponents['seconds']:.2f}")
+        for key, k in exponents.items():
+            if k > MAX_EXPONENT:
+                failures.append(f"{key} grow as n^{k:.2f}")
+    return failures
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description="Check the figures against their golden snapshots, "
+                    "budgets and scaling.")
+    parser.add_argument("names", nargs="*",
+                        help="the figures to check (default: all)")
+    parser.add_argument("--update", action="store_true",
+                        help="rewrite the golden snapshots")
+    parser.add_argument("--no-scaling", action="store_true",
+                        help="skip the synthetic scaling runs")
+    parser.add_argument("-r", "--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    srd = read_data()
+    model = BestiaryModel(srd)
+    datasets = {"srd": prepare_data(srd),
+                f"synthetic_{SNAPSHOT_SIZE}": synthetic_data(
+                    model, SNAPSHOT_SIZE)}
+    scaling = {} if args.no_scaling else {
+        n: synthetic_data(model, n) for n in SCALING_SIZES}
+    os.makedirs(GOLDEN_DIR, exist_ok=True)
+
+    failed = 0
+    for name in args.names or FIGURES:
+        failures = check_figure(name, datasets, scaling, args.repeat,
+                                args.update)
+        for failure in failures:
+            print(f"  FAIL {failure}")
+        failed += bool(failures)
+    print(f"{len(args.names or FIGURES) - failed} passed, {failed} failed.")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
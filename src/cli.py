@@ -0,0 +1,179 @@
+import argparse
+import sys
+
+from paths import FIGURES_DIR, INDEX_PATH, PAGES_DIR, RAW_PATH
+
+# Heavy modules (pandas, Plotly) are imported inside the command functions,
+# so each command only pays for what it uses.
+
+
+def process(args: argparse.Namespace) -> int:
+    from data import process_data
+
+    process_data(args.sources or None, args.workers)
+    return 0
+
+
+def validate(args: argparse.Namespace) -> int:
+    import json
+
+    from validation import validate_blocks
+
+    with open(args.path, "r") as file:
+        monsters = json.load(file)
+    valid, errors = validate_blocks(monsters)
+    if len(errors):
+        print(errors.to_string(index=False))
+    n_invalid = len(monsters) - int(valid.sum())
+    print(f"{len(monsters) - n_invalid} valid, {n_invalid} invalid "
+          f"monster blocks, {len(errors) - n_invalid} with warnings.")
+    return 1 if n_invalid else 0
+
+
+def search(args: argparse.Namespace) -> int:
+    from search import NameIndex
+
+    for name in NameIndex.load(args.index).search(args.query, args.limit):
+        print(name)
+    return 0
+
+
+def complete(args: argparse.Namespace) -> int:
+    from search import NameIndex
+
+    for name in NameIndex.load(args.index).complete(args.prefix, args.limit):
+        print(name)
+    return 0
+
+
+def plots(args: argparse.Namespace) -> int:
+    from data import read_data
+    from plots import render_figures
+    from sinks import FileSink
+
+    render_figures(read_data(), FileSink(args.output, args.format),
+                   args.names or None)
+    return 0
+
+
+def pages(args: argparse.Namespace) -> int:
+    import json
+
+    from pages import write_pages
+
+    with open(args.path, "r") as file:
+        monsters = json.load(file)
+    stats = write_pages(monsters, args.output, args.workers)
+    print(", ".join(f"{value} {key}" for key, value in stats.items()))
+    return 0
+
+
+def outliers(args: argparse.Namespace) -> int:
+    import pandas as pd
+
+    from analysis import CRRegression
+    from data import read_data
+
+    model = CRRegression().fit(read_data())
+    scores = model.score(read_data(args.data) if args.data else read_data())
+    top = scores.loc[scores["ZScore"].abs().sort_values(
+        ascending=False).index[:args.limit]]
+    with pd.option_context("display.float_format", "{:.2f}".format):
+        print(top.to_string(index=False))
+    return 0
+
+
+def synth(args: argparse.Namespace) -> int:
+    from data import read_data
+    from synthetic import BestiaryModel, write_csv, write_json
+
+    model = BestiaryModel(read_data())
+    write = write_json if args.format == "json" else write_csv
+    write(model, args.output, args.n, args.seed, args.chunk_size)
+    return 0
+
+
+def watch(args: argparse.Namespace) -> int:
+    from watch import Pipeline, watch
+
+    try:
+        watch(Pipeline(), args.interval)
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 1
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description="Process and plot the D&D monsters data.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    p = subparsers.add_parser(
+        "process", help="process the raw data and build the name index")
+    p.add_argument("sources", nargs="*",
+                   help="raw data files or directories to merge, with the "
+                        "source of each monster in a `Source` column "
+                        "(default: the SRD file only)")
+    p.add_argument("--workers", type=int, default=8)
+    p.set_defaults(func=process)
+
+    p = subparsers.add_parser("validate", help="validate raw monster blocks")
+    p.add_argument("path", nargs="?", default=RAW_PATH)
+    p.set_defaults(func=validate)
+
+    for name, func, arg in (("search", search, "query"),
+                            ("complete", complete, "prefix")):
+        p = subparsers.add_parser(
+            name, help=f"find monster names by {arg}")
+        p.add_argument(arg)
+        p.add_argument("-n", "--limit", type=int, default=5)
+        p.add_argument("--index", default=INDEX_PATH)
+        p.set_defaults(func=func)
+
+    p = subparsers.add_parser("plots", help="render the figures")
+    p.add_argument("names", nargs="*",
+                   help="the figures to render (default: all)")
+    p.add_argument("--output", default=FIGURES_DIR)
+    p.add_argument("--format", choices=("html", "json"), default="html")
+    p.set_defaults(func=plots)
+
+    p = subparsers.add_parser(
+        "pages", help="write the stat block page of each monster")
+    p.add_argument("path", nargs="?", default=RAW_PATH)
+    p.add_argument("--output", default=PAGES_DIR)
+    p.add_argument("--workers", type=int, default=8)
+    p.set_defaults(func=pages)
+
+    p = subparsers.add_parser(
+        "outliers", help="list the monsters whose CR the stats explain worst")
+    p.add_argument("--data", help="processed data CSV to score against the "
+                                  "model fitted to the SRD (default: SRD)")
+    p.add_argument("-n", "--limit", type=int, default=10)
+    p.set_defaults(func=outliers)
+
+    p = subparsers.add_parser(
+        "synth", help="generate a synthetic bestiary fitted to the data")
+    p.add_argument("n", type=int, help="the number of monsters")
+    p.add_argument("output")
+    p.add_argument("--format", choices=("json", "csv"), default="csv",
+                   help="raw blocks (json) or processed data (csv)")
+    p.add_argument("--seed", type=int, default=42)
+    p.add_argument("--chunk-size", type=int, default=100_000)
+    p.set_defaults(func=synth)
+
+    p = subparsers.add_parser(
+        "watch", help="refresh the outputs when the inputs change")
+    p.add_argument("--interval", type=float, default=0.2)
+    p.set_defaults(func=watch)
+
+    return parser
+
+
+def main(argv: list = None) -> int:
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,19 +1,28 @@
+from types import MappingProxyType
+
+
 class Config:
-    def __init__(self):
-        self.CHALLENGE_RATINGS = [
-            "0", "1/8", "1/4", "1/2", "1", "2", "3", "4", "5",
-            "6", "7", "8", "9", "10", "11", "12", "13", "14",
-            "15", "16", "17", "18", "19", "20", "21", "22", "23",
-            "24", "25", "26", "27", "28", "29", "30"]
-        self.MONSTER_TYPES = [
-            "Aberration", "Beast", "Celestial", "Construct", "Dragon",
-            "Elemental", "Fey", "Fiend", "Giant", "Humanoid", "Monstrosity",
-            "Ooze", "Plant", "Undead"]
-        self.SIZES = ["Tiny", "Small", "Medium", "Large", "Huge", "Gargantuan"]
-        self.ABILITIES = ["Strength", "Dexterity", "Constitution",
-                          "Intelligence", "Wisdom", "Charisma"]
-        self.FONT_STACK = (
-            '-system-ui, -apple-system, BlinkMacSystemFont, '
-            'Segoe UI", Roboto, Helvetica, Arial, sans-serif, '
-            '"Apple Color Emoji", "Segoe UI Emoji", "Segoe UI Symbol"')
-        self.WIDTH = 1400
+    CHALLENGE_RATINGS = (
+        "0", "1/8", "1/4", "1/2", "1", "2", "3", "4", "5",
+        "6", "7", "8", "9", "10", "11", "12", "13", "14",
+        "15", "16", "17", "18", "19", "20", "21", "22", "23",
+        "24", "25", "26", "27", "28", "29", "30")
+    MONSTER_TYPES = (
+        "Aberration", "Beast", "Celestial", "Construct", "Dragon",
+        "Elemental", "Fey", "Fiend", "Giant", "Humanoid", "Monstrosity",
+        "Ooze", "Plant", "Undead")
+    SIZES = ("Tiny", "Small", "Medium", "Large", "Huge", "Gargantuan")
+    ABILITIES = ("Strength", "Dexterity", "Constitution",
+                 "Intelligence", "Wisdom", "Charisma")
+    FONT_STACK = (
+        '-system-ui, -apple-system, BlinkMacSystemFont, '
+        'Segoe UI", Roboto, Helvetica, Arial, sans-serif, '
+        '"Apple Color Emoji", "Segoe UI Emoji", "Segoe UI Symbol"')
+    WIDTH = 1400
+
+    # Lookup maps from each value to its position in the tuples above
+    CR_TO_INT = MappingProxyType(
+        {cr: i for i, cr in enumerate(CHALLENGE_RATINGS)})
+    TYPE_TO_INT = MappingProxyType(
+        {t: i for i, t in enumerate(MONSTER_TYPES)})
+    SIZE_TO_INT = MappingProxyType({s: i for i, s in enumerate(SIZES)})
@@ -1,41 +1,37 @@
 import pandas as pd
 import numpy as np
 import json
+import sys
 
+from alignment import alignment_means
 from config import Config
+from paths import ERRORS_PATH, INDEX_PATH, PROCESSED_PATH, RAW_PATH
+from records import Monster, MonsterColumns
+from search import NameIndex
+from sources import merge_sources
+from synthetic import BestiaryModel
+from validation import SPEED_PATTERN, validate_blocks
 
-np.random.seed(42)
-
-
-def generate_dummy_data(n_data: int) -> pd.DataFrame:
-    CHALLENGE_RATINGS = ["0", "1/8", "1/4", "1/2", "1", "2", "3", "4", "5",
-                         "6", "7", "8", "9", "10", "11", "12", "13", "14",
-                         "15", "16", "17", "18", "19", "20", "21", "22", "23",
-                         "24", "25", "26", "27", "28", "29", "30"]
-    TYPES = ["Aberration", "Beast", "Celestial", "Construct", "Dragon",
-             "Elemental", "Fey", "Fiend", "Giant", "Humanoid", "Monstrosity",
-             "Ooze", "Plant", "Undead"]
-    SIZES = ["Tiny", "Small", "Medium", "Large", "Huge", "Gargantuan"]
-    ALIGNMENTS = ["LG", "NG", "CG", "LN", "N", "CN", "LE", "NE", "CE", "U"]
-
-    df = pd.DataFrame({
-        "Name": [f"Monster{i}" for i in range(n_data)],
-        "ChallengeRating": np.random.choice(CHALLENGE_RATINGS, n_data),
-        "Type": np.random.choice(TYPES, n_data),
-        "Size": np.random.choice(SIZES, n_data),
-        "Strength": np.random.randint(1, 21, n_data),
-        "Dexterity": np.random.randint(1, 21, n_data),
-        "Constitution": np.random.randint(1, 21, n_data),
-        "Intelligence": np.random.randint(1, 21, n_data),
-        "Wisdom": np.random.randint(1, 21, n_data),
-        "Charisma": np.random.randint(1, 21, n_data),
-        "Alignment": np.random.choice(ALIGNMENTS, n_data),
-        "Speed": np.random.randint(20, 41, n_data),
-        "SwimSpeed": np.random.randint(0, 41, n_data),
-        "FlySpeed": np.random.randint(0, 41, n_data),
-    })
 
-    return df
+def generate_dummy_data(n_data: int, seed: int = 42) -> pd.DataFrame:
+    """
+    Generates synthetic monsters with the distributions of the processed
+    data. See `synthetic.py` to generate large data sets in chunks.
+
+    Parameters
+    ----------
+    n_data : int
+        The number of monsters.
+    seed : int, optional
+        The seed of the random number generator.
+
+    Returns
+    -------
+    pd.DataFrame
+        The monsters, in the format of the processed data.
+    """
+    return BestiaryModel(read_data()).sample(
+        n_data, np.random.default_rng(seed))
 
 
 def parse_speed_line(s: str) -> dict:
@@ -53,23 +49,14 @@ def parse_speed_line(s: str) -> dict:
         A dictionary with all the speeds of the monster.
     """
     data = {"walk": 0, "swim": 0, "fly": 0, "burrow": 0, "climb": 0}
-    s_split = s.split(".")
-    for e in s_split:
-        if "ft" in e:
-            if "swim" in e:
-                data["swim"] = e.split(" ")[2]
-            elif "fly" in e:
-                data["fly"] = e.split(" ")[2]
-            elif "burrow" in e:
-                data["burrow"] = e.split(" ")[2]
-            elif "climb" in e:
-                data["climb"] = e.split(" ")[2]
-            else:
-                data["walk"] = e.split(" ")[0]
+    # Unlabeled speeds are walking speeds. If there are several (e.g. the
+    # lycanthropes, "30 ft., 40 ft. in wolf form"), the last one is kept.
+    for kind, value in SPEED_PATTERN.findall(s):
+        data[kind or "walk"] = value
     return data
 
 
-def parse_monster_block(block: dict) -> list:
+def parse_monster_block(block: dict) -> Monster:
     """
     Parses the monster block.
 
@@ -80,162 +67,150 @@ def parse_monster_block(block: dict) -> list:
 
     Returns
     -------
-    list
-        A list with relevant values.
+    Monster
+        The relevant values of the monster.
     """
     speed_data = parse_speed_line(block["Speed"])
-    if block["name"] == "Werebear":
-        data = [block["name"],
-                block["Challenge"].split(" (")[0],
-                block["meta"].split(" ")[1].split(",")[0],
-                block["meta"].split(" ")[0],
-                int(block["STR"]),
-                int(block["DEX"]),
-                int(block["CON"]),
-                int(block["INT"]),
-                int(block["WIS"]),
-                int(block["CHA"]),
-                block["meta"].split(", ")[1],
-                int(block["Speed"][8:10]),
-                0,
-                0,
-                0,
-                int(block["Speed"][22:24]),
-                ]
-    elif block["name"] == "Wereboar":
-        data = [block["name"],
-                block["Challenge"].split(" (")[0],
-                block["meta"].split(" ")[1].split(",")[0],
-                block["meta"].split(" ")[0],
-                int(block["STR"]),
-                int(block["DEX"]),
-                int(block["CON"]),
-                int(block["INT"]),
-                int(block["WIS"]),
-                int(block["CHA"]),
-                block["meta"].split(", ")[1],
-                int(block["Speed"][8:10]),
-                0,
-                0,
-                0,
-                0,
-                ]
-    elif block["name"] == "Weretiger":
-        data = [block["name"],
-                block["Challenge"].split(" (")[0],
-                block["meta"].split(" ")[1].split(",")[0],
-                block["meta"].split(" ")[0],
-                int(block["STR"]),
-                int(block["DEX"]),
-                int(block["CON"]),
-                int(block["INT"]),
-                int(block["WIS"]),
-                int(block["CHA"]),
-                block["meta"].split(", ")[1],
-                int(block["Speed"][8:10]),
-                0,
-                0,
-                0,
-                0,
-                ]
-    elif block["name"] == "Werewolf":
-        data = [block["name"],
-                block["Challenge"].split(" (")[0],
-                block["meta"].split(" ")[1].split(",")[0],
-                block["meta"].split(" ")[0],
-                int(block["STR"]),
-                int(block["DEX"]),
-                int(block["CON"]),
-                int(block["INT"]),
-                int(block["WIS"]),
-                int(block["CHA"]),
-                block["meta"].split(", ")[1],
-                int(block["Speed"][8:10]),
-                0,
-                0,
-                0,
-                0,
-                ]
-    else:
-        data = [block["name"],
-                block["Challenge"].split(" (")[0],
-                block["meta"].split(" ")[1].split(",")[0],
-                block["meta"].split(" ")[0],
-                int(block["STR"]),
-                int(block["DEX"]),
-                int(block["CON"]),
-                int(block["INT"]),
-                int(block["WIS"]),
-                int(block["CHA"]),
-                block["meta"].split(", ")[1],
-                int(speed_data["walk"]),
-                int(speed_data["swim"]),
-                int(speed_data["fly"]),
-                int(speed_data["burrow"]),
-                int(speed_data["climb"]),
-                ]
-    return data
+    return Monster(block["name"],
+                   block["Challenge"].split(" (")[0],
+                   block["meta"].split(" ")[1].split(",")[0],
+                   block["meta"].split(" ")[0],
+                   int(block["STR"]),
+                   int(block["DEX"]),
+                   int(block["CON"]),
+                   int(block["INT"]),
+                   int(block["WIS"]),
+                   int(block["CHA"]),
+                   block["meta"].split(", ")[1],
+                   int(speed_data["walk"]),
+                   int(speed_data["swim"]),
+                   int(speed_data["fly"]),
+                   int(speed_data["burrow"]),
+                   int(speed_data["climb"]))
+
+
+def map_alignment(alignment: str) -> tuple:
+    """
+    Maps an alignment to the good-evil and lawful-chaotic scales, with the
+    same cells as the alignment histograms (see `alignment.alignment_means`).
+    """
+    return alignment_means(alignment)
 
 
-def map_alignment(alignment):
-    good_evil_map = {'good': 1, 'neutral': 0, 'evil': -1}
-    lawful_chaotic_map = {'lawful': -1, 'neutral': 0, 'chaotic': 1}
-    if alignment in ('any', 'unaligned'):
-        return np.nan, np.nan
-    if alignment == "any evil alignment":
-        return -1, np.nan
-    parts = alignment.split()
-    if len(parts) == 2:
-        lc, eg = parts
-    else:
-        lc = eg = 'neutral'
-    return good_evil_map[eg], lawful_chaotic_map[lc]
+def monsters_to_frame(monsters: list) -> pd.DataFrame:
+    """
+    Parses a list of monster blocks into a data frame.
 
+    Parameters
+    ----------
+    monsters : list
+        The monster blocks.
 
-def process_data() -> None:
+    Returns
+    -------
+    pd.DataFrame
+        A data frame with one row per monster and the columns in `COLUMNS`.
     """
-    Reads the raw data and saves a new CSV file with the results of the
-    processing.
+    columns = MonsterColumns()
+    for monster in monsters:
+        columns.append(parse_monster_block(monster))
+    df = columns.to_frame()
+    df["Type"] = df["Type"].str.title()
+    return df
+
+
+def add_derived_columns(df: pd.DataFrame) -> pd.DataFrame:
     """
-    with open('data/raw/srd_5e_monsters.json', 'r') as file:
-        monsters = json.load(file)
+    Adds the auxiliary columns used for plotting to the processed data, in
+    place.
 
-    cols = ["Name", "ChallengeRating", "Type", "Size", "Strength", "Dexterity",
-            "Constitution", "Intelligence", "Wisdom", "Charisma", "Alignment",
-            "WalkSpeed", "SwimSpeed", "FlySpeed", "BurrowSpeed", "ClimbSpeed"]
-    data = []
-    for monster in monsters:
-        data.append(parse_monster_block(monster))
-    data = np.array(data)
+    Parameters
+    ----------
+    df : pd.DataFrame
+        The processed data.
 
-    df = pd.DataFrame(data, columns=cols)
-    df["Type"] = df["Type"].str.title()
+    Returns
+    -------
+    pd.DataFrame
+        The same data frame, with the auxiliary columns.
+    """
+    alignments = {a: map_alignment(a) for a in df["Alignment"].unique()}
 
-    df.to_csv("data/processed/srd_5e_monsters.csv", index=False)
+    df["ChallengeRatingInt"] = df["ChallengeRating"].map(Config.CR_TO_INT)
+    df["Alignment_EG"] = df["Alignment"].map(
+        lambda x: alignments[x][0]).astype(float)
+    df["Alignment_LC"] = df["Alignment"].map(
+        lambda x: alignments[x][1]).astype(float)
+    return df
 
 
-def read_data() -> pd.DataFrame:
+def process_data(sources: list = None, max_workers: int = 8) -> None:
+    """
+    Reads the raw data and saves a new CSV file with the results of the
+    processing, along with the name search index. Blocks that fail the
+    validation are skipped and listed in an error report, along with the
+    blocks that got warnings.
+
+    Parameters
+    ----------
+    sources : list, optional
+        Raw data files or directories of raw data files to merge (see
+        `sources.merge_sources`). The processed data then has a `Source`
+        column with the file of each monster. Only `RAW_PATH` is read if
+        omitted.
+    max_workers : int, optional
+        The number of threads that read the sources.
+    """
+    if sources is None:
+        with open(RAW_PATH, 'r') as file:
+            monsters = json.load(file)
+        valid, errors = validate_blocks(monsters)
+        monsters = [m for m, ok in zip(monsters, valid) if ok]
+    else:
+        monsters, origins, errors, n_duplicates = merge_sources(
+            sources, max_workers)
+        if n_duplicates:
+            print(f"Dropped {n_duplicates} duplicate monster blocks.",
+                  file=sys.stderr)
+
+    errors.to_csv(ERRORS_PATH, index=False)
+    # Sources that could not be read are reported with the `Index` -1
+    n_unreadable = int((errors["Index"] == -1).sum())
+    n_rejected = int(errors["Rejected"].sum()) - n_unreadable
+    if n_unreadable:
+        print(f"Skipped {n_unreadable} unreadable sources, see "
+              f"`{ERRORS_PATH}`.", file=sys.stderr)
+    if n_rejected:
+        print(f"Skipped {n_rejected} invalid monster blocks, see "
+              f"`{ERRORS_PATH}`.", file=sys.stderr)
+    n_warned = len(errors) - n_rejected - n_unreadable
+    if n_warned:
+        print(f"Kept {n_warned} monster blocks with warnings, see "
+              f"`{ERRORS_PATH}`.", file=sys.stderr)
+
+    df = monsters_to_frame(monsters)
+    if sources is not None:
+        df["Source"] = pd.Series(origins, dtype=str)
+    df.to_csv(PROCESSED_PATH, index=False)
+    NameIndex.build(df["Name"]).save(INDEX_PATH)
+
+
+def read_data(path: str = PROCESSED_PATH) -> pd.DataFrame:
     """
     Reads the processed data CSV and returns a data frame.
 
+    Parameters
+    ----------
+    path : str, optional
+        The path of the processed data CSV.
+
     Returns
     -------
     pd.DataFrame
         The processed data.
     """
-    config = Config()
-    df = pd.read_csv("data/processed/srd_5e_monsters.csv")
-
-    def cr_to_int(cr: str) -> int:
-        return config.CHALLENGE_RATINGS.index(cr)
-
-    # Add aux data for plotting
-    df["ChallengeRatingInt"] = df["ChallengeRating"].apply(cr_to_int)
-    df[['Alignment_EG', 'Alignment_LC']] = df['Alignment'].apply(
-        lambda x: pd.Series(map_alignment(x))
-        )
-
-    return df
+    df = pd.read_csv(path)
+    return add_derived_columns(df)
 
 
 if __name__ == "__main__":
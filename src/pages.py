@@ -0,0 +1,321 @@
+import hashlib
+import html
+import json
+import os
+import re
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from html.parser import HTMLParser
+from string import Template
+
+from config import Config
+from data import parse_monster_block
+from paths import PAGES_DIR
+from sinks import atomic_write
+from validation import ABILITY_FIELDS, validate_blocks
+
+MANIFEST_NAME = "manifest.json"
+PROPERTY_FIELDS = ["Saving Throws", "Skills", "Damage Vulnerabilities",
+                   "Damage Resistances", "Damage Immunities",
+                   "Condition Immunities", "Senses", "Languages", "Challenge"]
+# Fields that already hold HTML in the raw data. Only the tags below are
+# kept, without attributes, so a third-party source cannot inject scripts
+# or styles into the pages.
+SECTION_FIELDS = ["Traits", "Actions", "Reactions", "Legendary Actions"]
+SECTION_TAGS = ("p", "br", "em", "strong", "b", "i", "ul", "ol", "li",
+                "span", "div")
+
+PAGE_TEMPLATE = Template("""<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<title>$name</title>
+<style>
+body { font-family: $font_stack; max-width: 800px; margin: 2em auto; }
+h1 { margin-bottom: 0; }
+.meta { font-style: italic; margin-top: 0; }
+table { border-collapse: collapse; text-align: center; }
+td, th { padding: 0 1em; }
+img { float: right; max-width: 250px; }
+</style>
+</head>
+<body>
+$image<h1>$name</h1>
+<p class="meta">$meta</p>
+<p><strong>Armor Class</strong> $armor_class<br>
+<strong>Hit Points</strong> $hit_points<br>
+<strong>Speed</strong> $speed</p>
+<table>
+<tr>$ability_names</tr>
+<tr>$ability_scores</tr>
+</table>
+<p>$properties</p>
+$sections</body>
+</html>
+""")
+# Changing the template or the allowed tags must rewrite every page
+TEMPLATE_HASH = hashlib.blake2b(
+    (PAGE_TEMPLATE.template + " ".join(SECTION_TAGS)).encode("utf-8"),
+    digest_size=8).hexdigest()
+
+
+def _compile(template: Template) -> str:
+    """
+    Compiles a template to a `str.format` string, which is much faster to
+    fill than `Template.substitute`.
+    """
+    escaped = template.template.replace("{", "{{").replace("}", "}}")
+    return template.pattern.sub(
+        lambda m: "{%s}" % (m.group("named") or m.group("braced"))
+        if m.group("escaped") is None else "$", escaped)
+
+
+PAGE_FORMAT = _compile(PAGE_TEMPLATE)
+# Most values (sizes, speeds, scores, senses...) repeat across monsters
+_escape = lru_cache(maxsize=1 << 16)(html.escape)
+# Sections made only of text, entities and allowed tags need no parsing
+_PLAIN_SECTION = re.compile(
+    r"(?:[^<&]|&#?\w+;|</?(?:%s)>)*" % "|".join(SECTION_TAGS))
+
+
+def _text(value) -> str:
+    # Sources other than the SRD may hold numbers or lists of strings
+    if isinstance(value, str):
+        return value
+    if isinstance(value, (list, tuple)):
+        return ", ".join(map(str, value))
+    return str(value)
+
+
+def _e(value) -> str:
+    return _escape(_text(value))
+
+
+class _SectionSanitizer(HTMLParser):
+    """
+    Rebuilds an HTML section with only the allowed tags, without their
+    attributes. The content of `script` and `style` elements is dropped.
+    """
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts = []
+        self.skipping = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in ("script", "style"):
+            self.skipping += 1
+        elif tag in SECTION_TAGS and not self.skipping:
+            self.parts.append(f"<{tag}>")
+
+    def handle_endtag(self, tag):
+        if tag in ("script", "style"):
+            self.skipping = max(self.skipping - 1, 0)
+        elif tag in SECTION_TAGS and tag != "br" and not self.skipping:
+            self.parts.append(f"</{tag}>")
+
+    def handle_data(self, data):
+        if not self.skipping:
+            self.parts.append(html.escape(data, quote=False))
+
+
+def sanitize_section(markup) -> str:
+    """
+    Returns an HTML section of a raw monster block that is safe to insert
+    in a page.
+
+    Parameters
+    ----------
+    markup
+        The section. Values that are not strings are converted to text.
+
+    Returns
+    -------
+    str
+        The section with only the tags in `SECTION_TAGS`, without
+        attributes, and with any other markup removed (`script` and
+        `style` elements) or escaped.
+    """
+    markup = _text(markup)
+    if _PLAIN_SECTION.fullmatch(markup):
+        return markup
+    parser = _SectionSanitizer()
+    parser.feed(markup)
+    parser.close()
+    return "".join(parser.parts)
+
+
+def page_slug(name: str) -> str:
+    """
+    Returns the file name stem of the page of a monster.
+
+    Parameters
+    ----------
+    name : str
+        The name of the monster.
+
+    Returns
+    -------
+    str
+        The name in lower case with runs of other characters replaced by
+        hyphens (e.g. `adult-red-dragon`).
+    """
+    return re.sub(r"[^a-z0-9]+", "-", name.lower()).strip("-") or "monster"
+
+
+def block_hash(block: dict) -> str:
+    """
+    Returns a hash of a raw monster block and of the page template.
+
+    Parameters
+    ----------
+    block : dict
+        The raw monster block.
+
+    Returns
+    -------
+    str
+        The hexadecimal hash.
+    """
+    payload = repr(block).encode("utf-8")
+    return hashlib.blake2b(payload, key=TEMPLATE_HASH.encode("utf-8"),
+                           digest_size=16).hexdigest()
+
+
+def render_page(block: dict) -> str:
+    """
+    Renders the stat block page of a monster.
+
+    Parameters
+    ----------
+    block : dict
+        A raw monster block that passed the validation.
+
+    Returns
+    -------
+    str
+        The HTML page.
+    """
+    monster = parse_monster_block(block)
+    e = _e
+
+    properties = "<br>\n".join(
+        f"<strong>{field}</strong> {e(block[field])}"
+        for field in PROPERTY_FIELDS if block.get(field))
+    sections = "".join(
+        f"<h2>{field}</h2>\n{sanitize_section(block[field])}\n"
+        for field in SECTION_FIELDS if block.get(field))
+    image = (f'<img src="{e(block["img_url"])}" alt="{e(monster.name)}">\n'
+             if block.get("img_url") else "")
+
+    return PAGE_FORMAT.format(
+        name=e(monster.name),
+        font_stack=Config.FONT_STACK,
+        image=image,
+        meta=e(f"{monster.size} {monster.type}, {monster.alignment}"),
+        armor_class=e(block.get("Armor Class", "")),
+        hit_points=e(block.get("Hit Points", "")),
+        speed=e(_text(block["Speed"]).strip()),
+        ability_names="".join(f"<th>{f}</th>" for f in ABILITY_FIELDS),
+        ability_scores="".join(
+            f"<td>{e(block[f])} {e(block.get(f'{f}_mod', ''))}</td>"
+            for f in ABILITY_FIELDS),
+        properties=properties,
+        sections=sections,
+    )
+
+
+def _load_manifest(path: str) -> dict:
+    try:
+        with open(path, "r") as file:
+            return json.load(file)
+    except FileNotFoundError:
+        return {}
+
+
+def _write_files(files: list) -> None:
+    for path, payload in files:
+        atomic_write(path, payload)
+
+
+def _submit_batch(pool: ThreadPoolExecutor, n_slices: int, batch: list,
+                  pending: deque) -> None:
+    # One task per slice keeps the overhead of the pool per batch, not per
+    # page. Rendering goes on while the files are written, but with no more
+    # than two batches in flight.
+    for i in range(n_slices):
+        pending.append(pool.submit(_write_files, batch[i::n_slices]))
+    while len(pending) > 2 * n_slices:
+        pending.popleft().result()
+
+
+def write_pages(monsters: list, directory: str = PAGES_DIR,
+                max_workers: int = 8, batch_size: int = 1000) -> dict:
+    """
+    Renders the stat block page of each valid monster block and writes the
+    pages whose block changed since the last run. A manifest in the output
+    directory stores the hash of the block of each page. Pages of monsters
+    that are no longer in the data are removed.
+
+    Parameters
+    ----------
+    monsters : list
+        The raw monster blocks.
+    directory : str, optional
+        The output directory.
+    max_workers : int, optional
+        The number of threads that write the files.
+    batch_size : int, optional
+        The number of rendered pages held in memory at once.
+
+    Returns
+    -------
+    dict
+        The number of pages `written`, `unchanged`, `removed` and `invalid`.
+    """
+    os.makedirs(directory, exist_ok=True)
+    manifest_path = os.path.join(directory, MANIFEST_NAME)
+    old_manifest = _load_manifest(manifest_path)
+    manifest = {}
+    valid, errors = validate_blocks(monsters)
+    stats = {"written": 0, "unchanged": 0, "removed": 0,
+             "invalid": int(errors["Rejected"].sum())}
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        pending = deque()
+        batch = []
+        for block, ok in zip(monsters, valid):
+            if not ok:
+                continue
+            slug = page_slug(block["name"])
+            # Monsters that share a slug get numbered pages
+            stem, n = slug, 1
+            while slug in manifest:
+                n += 1
+                slug = f"{stem}-{n}"
+            manifest[slug] = block_hash(block)
+
+            path = os.path.join(directory, f"{slug}.html")
+            if old_manifest.get(slug) == manifest[slug] \
+                    and os.path.exists(path):
+                stats["unchanged"] += 1
+                continue
+            batch.append((path, render_page(block).encode("utf-8")))
+            if len(batch) >= batch_size:
+                _submit_batch(pool, max_workers, batch, pending)
+                stats["written"] += len(batch)
+                batch = []
+        _submit_batch(pool, max_workers, batch, pending)
+        stats["written"] += len(batch)
+        for future in pending:
+            future.result()
+
+    for slug in old_manifest.keys() - manifest.keys():
+        try:
+            os.remove(os.path.join(directory, f"{slug}.html"))
+        except FileNotFoundError:
+            pass
+        stats["removed"] += 1
+
+    atomic_write(manifest_path, json.dumps(manifest).encode("utf-8"))
+    return stats
@@ -0,0 +1,10 @@
+# Default locations of the inputs and outputs, relative to the root of the
+# repository. This module has no imports, so the CLI can read the defaults
+# without loading the heavy modules.
+RAW_PATH = "data/raw/srd_5e_monsters.json"
+PROCESSED_PATH = "data/processed/srd_5e_monsters.csv"
+INDEX_PATH = "data/processed/srd_5e_monsters_names.npz"
+ERRORS_PATH = "data/processed/srd_5e_monsters_errors.csv"
+FIGURES_DIR = "reports/html"
+PAGES_DIR = "reports/pages"
+GOLDEN_DIR = "reports/golden"
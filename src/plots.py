@@ -1,53 +1,115 @@
+import weakref
+
 import numpy as np
 import pandas as pd
-import plotly.express as px
 import plotly.graph_objects as go
 
+from alignment import AlignmentHistograms
 from data import read_data
 from config import Config
 from colors import Colors
+from paths import FIGURES_DIR
+from sinks import FileSink, fig_to_json
 
 MAX_PER_ROW = 6
 CATEGORY_SPACING = 2
+# Frames returned by `prepare_data`, keyed by their id and the grid
+# parameters. Subsets and other derived frames are not in it, so their
+# positions are recomputed.
+_PREPARED = weakref.WeakValueDictionary()
+# Alignment histograms of the frames returned by `prepare_data`, keyed by
+# their id until the frame is garbage collected
+_HISTOGRAMS = {}
 
 
 def _assign_grid_positions(df: pd.DataFrame,
                            max_per_row: int = 6,
                            category_spacing: int = 2) -> pd.DataFrame:
     df = df.copy()
-    df['xScatter'] = 0
-    df['yScatter'] = 0
-
-    sorted_categories = (
-        df[['ChallengeRating', 'ChallengeRatingInt']]
-        .drop_duplicates()
-        .sort_values('ChallengeRatingInt')
-        .reset_index(drop=True)
-    )
 
-    for i, row in sorted_categories.iterrows():
-        category = row['ChallengeRating']
-        cat_mask = df['ChallengeRating'] == category
-        cat_indices = df[cat_mask].index
+    # Rank of each Challenge Rating among the ones present in the data and
+    # position of each monster inside its Challenge Rating bucket
+    cr_rank = df["ChallengeRatingInt"].rank(method="dense").astype(int) - 1
+    j = df.groupby("ChallengeRatingInt", sort=False).cumcount()
+
+    x_offset = cr_rank * (max_per_row + category_spacing)
+    df["xScatter"] = (j % max_per_row + x_offset).astype(int)
+    df["yScatter"] = (j // max_per_row).astype(int)
 
-        x_offset = i * (max_per_row + category_spacing)
+    return df
 
-        for j, idx in enumerate(cat_indices):
-            x = (j % max_per_row) + x_offset
-            y = j // max_per_row
-            df.at[idx, 'xScatter'] = x
-            df.at[idx, 'yScatter'] = y
 
+def prepare_data(df: pd.DataFrame,
+                 max_per_row: int = MAX_PER_ROW,
+                 category_spacing: int = CATEGORY_SPACING) -> pd.DataFrame:
+    """
+    Returns a copy of the data frame with the auxiliary columns used by the
+    figures. The input is never modified and data frames returned by this
+    function are returned as they are, so the columns are computed only
+    once per data frame. Any other frame, such as a subset of a prepared
+    one, gets new grid positions.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        The data frame as returned by `read_data`.
+    max_per_row : int, optional
+        The maximum number of markers per row in each Challenge Rating bucket.
+    category_spacing : int, optional
+        The horizontal spacing between Challenge Rating buckets.
+
+    Returns
+    -------
+    pd.DataFrame
+        The data frame with the auxiliary columns.
+    """
+    key = (id(df), max_per_row, category_spacing)
+    if _PREPARED.get(key) is df:
+        return df
+    df = _assign_grid_positions(df, max_per_row, category_spacing)
+    df["TypeLower"] = df["Type"].str.lower()
+    _PREPARED[(id(df), max_per_row, category_spacing)] = df
     return df
 
 
+def alignment_histograms(df: pd.DataFrame) -> AlignmentHistograms:
+    """
+    Returns the alignment histograms of the data, computed only once per
+    data frame returned by `prepare_data`, so the alignment figures share
+    them.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        The data frame as returned by `read_data` or `prepare_data`.
+
+    Returns
+    -------
+    AlignmentHistograms
+        The histograms.
+    """
+    df = prepare_data(df)
+    key = id(df)
+    if key not in _HISTOGRAMS:
+        _HISTOGRAMS[key] = AlignmentHistograms.from_frame(df)
+        # The id can only be reused once the frame is collected
+        weakref.finalize(df, _HISTOGRAMS.pop, key, None)
+    return _HISTOGRAMS[key]
+
+
+def _bucket_starts(df: pd.DataFrame) -> pd.Series:
+    # The leftmost position of each Challenge Rating, computed in one pass
+    # rather than with a scan of the data per Challenge Rating
+    return df.groupby("ChallengeRating")["xScatter"].min()
+
+
 def _calculate_bucket_lines(df: pd.DataFrame) -> np.ndarray:
-    config = Config()
     bucket_lines = []
-    for cr in config.CHALLENGE_RATINGS:
-        if cr in df["ChallengeRating"].to_list():
-            x_min = df[df["ChallengeRating"] == cr]["xScatter"].min() - 1
-            x_max = df[df["ChallengeRating"] == cr]["xScatter"].min() + 6
+    starts = _bucket_starts(df)
+    for cr in Config.CHALLENGE_RATINGS:
+        if cr in starts.index:
+            x_min = starts[cr] - 1
+            x_max = starts[cr] + 6
             y_min = -1
             y_max = 0.5
             bucket_lines.append([x_min, y_max, x_min, y_min])
@@ -57,192 +119,64 @@ def _calculate_bucket_lines(df: pd.DataFrame) -> np.ndarray:
 
 
 def _calculate_bucket_labels(df: pd.DataFrame) -> dict:
-    config = Config()
     bucket_labels = {}
-    for cr in config.CHALLENGE_RATINGS:
-        if cr in df["ChallengeRating"].to_list():
-            x_pos = df[df["ChallengeRating"] == cr]["xScatter"].min() + 2.5
+    starts = _bucket_starts(df)
+    for cr in Config.CHALLENGE_RATINGS:
+        if cr in starts.index:
+            x_pos = starts[cr] + 2.5
             y_pos = -1.5
             bucket_labels[cr] = np.array([x_pos, y_pos])
     return bucket_labels
 
 
-def generate_challenge_rating_fig(df: pd.DataFrame) -> None:
+def _bucket_decorations(df: pd.DataFrame, title: str) -> tuple:
     """
-    Generate a scatter plot of monster Challenge Rating.
+    Returns the shapes (bucket lines) and annotations (bucket labels and
+    title) of the Challenge Rating scatter plots, to be set with a single
+    `update_layout` call rather than one `add_shape` or `add_annotation`
+    call each, which re-validates the whole layout every time.
     """
-    config = Config()
-
-    df["TypeLower"] = df["Type"].str.lower()
-
-    bucket_lines = _calculate_bucket_lines(df)
-    bucket_labels = _calculate_bucket_labels(df)
-
-    fig = px.scatter(df, x="xScatter", y="yScatter")
-    fig.update_traces(
-        marker=dict(size=5, color=Colors.MARKER_COLOR),
-        hovertemplate="<b>%{customdata[0]}</b><br><i>%{customdata[3]} "
-                      "%{customdata[1]}</i>"
-                      "<br>CR: %{customdata[2]}<extra></extra>",
-        customdata=df[["Name", "TypeLower", "ChallengeRating", "Size"]].values)
-    for bucket_line in bucket_lines:
-        fig.add_shape(
-            type="line",
-            x0=bucket_line[0], y0=bucket_line[1],
-            x1=bucket_line[2], y1=bucket_line[3],
-            line=dict(color="black", width=1)
-            )
-    for cr, label_pos in bucket_labels.items():
-        fig.add_annotation(
-            text=cr,
-            xref="x", yref="y", x=label_pos[0], y=label_pos[1],
-            showarrow=False, borderpad=0, align="center", xanchor="center",
-            font=dict(size=12, color="black", family=config.FONT_STACK),
-            borderwidth=0, yanchor="top")
-    fig.add_annotation(
-        text="Monsters by <b>Challenge Rating</b>",
+    shapes = [
+        dict(type="line",
+             x0=line[0], y0=line[1], x1=line[2], y1=line[3],
+             line=dict(color="black", width=1))
+        for line in _calculate_bucket_lines(df)]
+    annotations = [
+        dict(text=cr,
+             xref="x", yref="y", x=label_pos[0], y=label_pos[1],
+             showarrow=False, borderpad=0, align="center", xanchor="center",
+             font=dict(size=12, color="black", family=Config.FONT_STACK),
+             borderwidth=0, yanchor="top")
+        for cr, label_pos in _calculate_bucket_labels(df).items()]
+    annotations.append(dict(
+        text=title,
         xref="paper", yref="paper", x=0.5, y=1.3, showarrow=False, borderpad=0,
-        font=dict(size=14, color="black", family=config.FONT_STACK),
-        align="center", xanchor="center", borderwidth=0)
-    fig.update_layout(
-        xaxis=dict(
-            title=dict(text=""),
-            automargin=False,
-            range=(-2, 223),
-            fixedrange=True,
-            showticklabels=False,
-            tickvals=[],
-            showgrid=False,
-            zeroline=False,
-            ),
-        yaxis=dict(
-            range=(-4, 8),
-            title=dict(text=""),
-            automargin=False,
-            fixedrange=True,
-            showgrid=False,
-            showticklabels=False,
-            tickvals=[],
-            zeroline=False,
-            ),
-        paper_bgcolor=Colors.BG_COLOR,
-        plot_bgcolor=Colors.BG_COLOR,
-        margin=dict(l=10, r=10, t=30, b=10),
-        width=config.WIDTH,
-        height=120,
-        )
-
-    fig.write_html(
-        "reports/html/monster_cr.html",
-        full_html=False, include_plotlyjs='cdn',
-        config={
-            "displayModeBar": False,
-            })
+        font=dict(size=14, color="black", family=Config.FONT_STACK),
+        align="center", xanchor="center", borderwidth=0))
+    return shapes, annotations
 
 
-def generate_challenge_rating_by_type_fig(df: pd.DataFrame) -> None:
+def generate_challenge_rating_fig(df: pd.DataFrame) -> go.Figure:
     """
-    Generate a scatter plot of monster Challenge Rating with a dropdown
-    to highlight points by Type.
+    Generate a scatter plot of monster Challenge Rating.
     """
-    config = Config()
-
-    df["TypeLower"] = df["Type"].str.lower()
-
-    bucket_lines = _calculate_bucket_lines(df)
-    bucket_labels = _calculate_bucket_labels(df)
+    df = prepare_data(df)
 
-    base_marker = dict(size=5, color=Colors.MARKER_COLOR)
+    shapes, annotations = _bucket_decorations(
+        df, "Monsters by <b>Challenge Rating</b>")
 
     fig = go.Figure()
     fig.add_trace(go.Scatter(
         x=df["xScatter"],
         y=df["yScatter"],
         mode="markers",
-        marker=base_marker,
+        marker=dict(size=5, color=Colors.MARKER_COLOR),
         hovertemplate="<b>%{customdata[0]}</b><br><i>%{customdata[3]} "
                       "%{customdata[1]}</i>"
                       "<br>CR: %{customdata[2]}<extra></extra>",
         customdata=df[["Name", "TypeLower", "ChallengeRating", "Size"]].values,
-        name="All",
-        visible=True
+        showlegend=False,
     ))
-
-    for t in config.MONSTER_TYPES:
-        mask = df["Type"] == t
-        highlight_color = Colors.MARKER_HIG_COLOR
-        faded_color = Colors.MARKER_COLOR
-
-        marker_colors = [highlight_color if m else faded_color for m in mask]
-
-        fig.add_trace(go.Scatter(
-            x=df["xScatter"],
-            y=df["yScatter"],
-            mode="markers",
-            marker=dict(size=5, color=marker_colors),
-            hovertemplate="<b>%{customdata[0]}</b><br><i>%{customdata[3]} "
-                          "%{customdata[1]}</i>"
-                          "<br>CR: %{customdata[2]}<extra></extra>",
-            customdata=df[["Name", "TypeLower",
-                           "ChallengeRating", "Size"]].values,
-            name=t,
-            visible=False
-        ))
-
-    buttons = [
-        dict(label="All",
-             method="update",
-             args=[{"visible": [True] + [False] * len(config.MONSTER_TYPES)}])
-    ]
-
-    for i, t in enumerate(config.MONSTER_TYPES):
-        visibility = [False] * (len(config.MONSTER_TYPES) + 1)
-        visibility[i + 1] = True
-        buttons.append(dict(
-            label=t,
-            method="update",
-            args=[{"visible": visibility}]
-        ))
-
-    fig.update_layout(
-        updatemenus=[
-            dict(buttons=buttons,
-                 direction="left",
-                 showactive=True,
-                 active=0,
-                 x=1.0,
-                 xanchor="right",
-                 y=1.2,
-                 yanchor="top",
-                 bgcolor=Colors.BUTTON_BG_COLOR,
-                 bordercolor="black",
-                 borderwidth=0,
-                 font=dict(family=config.FONT_STACK, size=12, color="black"),
-                 pad={"r": 0, "t": 0},
-                 )
-        ]
-    )
-
-    for bucket_line in bucket_lines:
-        fig.add_shape(
-            type="line",
-            x0=bucket_line[0], y0=bucket_line[1],
-            x1=bucket_line[2], y1=bucket_line[3],
-            line=dict(color="black", width=1)
-        )
-    for cr, label_pos in bucket_labels.items():
-        fig.add_annotation(
-            text=cr,
-            xref="x", yref="y", x=label_pos[0], y=label_pos[1],
-            showarrow=False, borderpad=0, align="center", xanchor="center",
-            font=dict(size=12, color="black", family=config.FONT_STACK),
-            borderwidth=0, yanchor="top")
-    fig.add_annotation(
-        text="Monsters by <b>Challenge Rating</b> and <b>Type</b>",
-        xref="paper", yref="paper", x=0.5, y=1.3, showarrow=False, borderpad=0,
-        font=dict(size=14, color="black", family=config.FONT_STACK),
-        align="center", xanchor="center", borderwidth=0)
-
     fig.update_layout(
         xaxis=dict(
             title=dict(text=""),
@@ -253,7 +187,7 @@ def generate_challenge_rating_by_type_fig(df: pd.DataFrame) -> None:
             tickvals=[],
             showgrid=False,
             zeroline=False,
-        ),
+            ),
         yaxis=dict(
             range=(-4, 8),
             title=dict(text=""),
@@ -263,84 +197,78 @@ def generate_challenge_rating_by_type_fig(df: pd.DataFrame) -> None:
             showticklabels=False,
             tickvals=[],
             zeroline=False,
-        ),
+            ),
         paper_bgcolor=Colors.BG_COLOR,
         plot_bgcolor=Colors.BG_COLOR,
         margin=dict(l=10, r=10, t=30, b=10),
-        width=config.WIDTH,
+        width=Config.WIDTH,
         height=120,
-    )
+        shapes=shapes,
+        annotations=annotations,
+        )
 
-    fig.write_html(
-        "reports/html/monster_cr_by_type.html",
-        full_html=False, include_plotlyjs='cdn',
-        config={
-            "displayModeBar": False,
-        })
+    return fig
 
 
-def generate_challenge_rating_by_size_fig(df: pd.DataFrame) -> None:
+def _highlight_scale(k: int, n: int) -> list:
     """
-    Generate a scatter plot of monster Challenge Rating with a dropdown
-    to highlight points by Size.
+    Returns a colorscale that highlights the markers with the code `k` out
+    of the codes `0` to `n - 1` (none if `k` is None), for markers colored
+    by code with `cmin=-0.5` and `cmax=n - 0.5`.
     """
-    config = Config()
+    faded, highlight = Colors.MARKER_COLOR, Colors.MARKER_HIG_COLOR
+    if k is None:
+        return [[0, faded], [1, faded]]
+    low, high = k / n, (k + 1) / n
+    return [[0, faded], [low, faded], [low, highlight], [high, highlight],
+            [high, faded], [1, faded]]
 
-    df["TypeLower"] = df["Type"].str.lower()
 
-    bucket_lines = _calculate_bucket_lines(df)
-    bucket_labels = _calculate_bucket_labels(df)
+def _highlight_scatter_fig(df: pd.DataFrame, column: str,
+                           categories: tuple, title: str) -> go.Figure:
+    """
+    Generate a scatter plot of monster Challenge Rating with a dropdown to
+    highlight the points of each category of a column.
+
+    A single trace holds the points, colored by the code of their category
+    (0 for categories that are not listed). The buttons only restyle the
+    colorscale, so the size of the figure grows linearly with the number of
+    monsters and does not depend on the number of categories.
+    """
+    df = prepare_data(df)
 
-    base_marker = dict(size=5, color=Colors.MARKER_COLOR)
+    shapes, annotations = _bucket_decorations(df, title)
+    codes = pd.Categorical(df[column], categories=categories).codes + 1
+    n_codes = len(categories) + 1
 
     fig = go.Figure()
     fig.add_trace(go.Scatter(
         x=df["xScatter"],
         y=df["yScatter"],
         mode="markers",
-        marker=base_marker,
+        marker=dict(size=5, color=codes.astype(np.int8),
+                    colorscale=_highlight_scale(None, n_codes),
+                    cmin=-0.5, cmax=n_codes - 0.5),
         hovertemplate="<b>%{customdata[0]}</b><br><i>%{customdata[3]} "
                       "%{customdata[1]}</i>"
                       "<br>CR: %{customdata[2]}<extra></extra>",
         customdata=df[["Name", "TypeLower", "ChallengeRating", "Size"]].values,
         name="All",
-        visible=True
     ))
 
-    for s in config.SIZES:
-        mask = df["Size"] == s
-        highlight_color = Colors.MARKER_HIG_COLOR
-        faded_color = Colors.MARKER_COLOR
-
-        marker_colors = [highlight_color if m else faded_color for m in mask]
-
-        fig.add_trace(go.Scatter(
-            x=df["xScatter"],
-            y=df["yScatter"],
-            mode="markers",
-            marker=dict(size=5, color=marker_colors),
-            hovertemplate="<b>%{customdata[0]}</b><br><i>%{customdata[3]} "
-                          "%{customdata[1]}</i>"
-                          "<br>CR: %{customdata[2]}<extra></extra>",
-            customdata=df[["Name", "TypeLower",
-                           "ChallengeRating", "Size"]].values,
-            name=s,
-            visible=False
-        ))
-
     buttons = [
         dict(label="All",
-             method="update",
-             args=[{"visible": [True] + [False] * len(config.SIZES)}])
+             method="restyle",
+             args=[{"marker.colorscale": [_highlight_scale(None, n_codes)]},
+                   [0]])
     ]
 
-    for i, s in enumerate(config.SIZES):
-        visibility = [False] * (len(config.SIZES) + 1)
-        visibility[i + 1] = True
+    for i, category in enumerate(categories):
         buttons.append(dict(
-            label=s,
-            method="update",
-            args=[{"visible": visibility}]
+            label=category,
+            method="restyle",
+            args=[{"marker.colorscale": [_highlight_scale(i + 1, n_codes)]},
+                  [0]]
         ))
 
     fig.update_layout(
@@ -356,33 +284,10 @@ def generate_challenge_rating_by_size_fig(df: pd.DataFrame) -> None:
                  bgcolor=Colors.BUTTON_BG_COLOR,
                  bordercolor="black",
                  borderwidth=0,
-                 font=dict(family=config.FONT_STACK, size=12, color="black"),
+                 font=dict(family=Config.FONT_STACK, size=12, color="black"),
                  pad={"r": 0, "t": 0},
                  )
-        ]
-    )
-
-    for bucket_line in bucket_lines:
-        fig.add_shape(
-            type="line",
-            x0=bucket_line[0], y0=bucket_line[1],
-            x1=bucket_line[2], y1=bucket_line[3],
-            line=dict(color="black", width=1)
-        )
-    for cr, label_pos in bucket_labels.items():
-        fig.add_annotation(
-            text=cr,
-            xref="x", yref="y", x=label_pos[0], y=label_pos[1],
-            showarrow=False, borderpad=0, align="center", xanchor="center",
-            font=dict(size=12, color="black", family=config.FONT_STACK),
-            borderwidth=0, yanchor="top")
-    fig.add_annotation(
-        text="Monsters by <b>Challenge Rating</b> and <b>Size</b>",
-        xref="paper", yref="paper", x=0.5, y=1.3, showarrow=False, borderpad=0,
-        font=dict(size=14, color="black", family=config.FONT_STACK),
-        align="center", xanchor="center", borderwidth=0)
-
-    fig.update_layout(
+        ],
         xaxis=dict(
             title=dict(text=""),
             automargin=False,
@@ -406,60 +311,88 @@ def generate_challenge_rating_by_size_fig(df: pd.DataFrame) -> None:
         paper_bgcolor=Colors.BG_COLOR,
         plot_bgcolor=Colors.BG_COLOR,
         margin=dict(l=10, r=10, t=30, b=10),
-        width=config.WIDTH,
+        width=Config.WIDTH,
         height=120,
+        shapes=shapes,
+        annotations=annotations,
     )
 
-    fig.write_html(
-        "reports/html/monster_cr_by_size.html",
-        full_html=False, include_plotlyjs='cdn',
-        config={
-            "displayModeBar": False,
-        })
+    return fig
 
 
-def generate_ability_radar_fig(df: pd.DataFrame) -> None:
-    config = Config()
-    df["TypeLower"] = df["Type"].str.lower()
-    fig = go.Figure()
+def generate_challenge_rating_by_type_fig(df: pd.DataFrame) -> go.Figure:
+    """
+    Generate a scatter plot of monster Challenge Rating with a dropdown
+    to highlight points by Type.
+    """
+    return _highlight_scatter_fig(
+        df, "Type", Config.MONSTER_TYPES,
+        "Monsters by <b>Challenge Rating</b> and <b>Type</b>")
 
-    buttons = []
-    for i, row in df.iterrows():
-        row_t = pd.DataFrame({
-            "Ability": [ability for ability in config.ABILITIES],
-            "Value": [row[ability] for ability in config.ABILITIES]
-        })
-        row_t = pd.concat([row_t, row_t.iloc[[0]]], ignore_index=True)
-        text = [row["Name"]] * len(row_t)
-        fig.add_trace(go.Scatterpolar(
-            theta=row_t["Ability"],
-            r=row_t["Value"],
-            marker={"color": Colors.MARKER_HIG_COLOR},
-            visible=False,
-            mode="lines+markers",
-            name=row["Name"],
-            fill="toself",
-            line=dict(width=2),
-            hovertemplate="<b>%{text}</b><br>%{theta}: %{r}<extra></extra>",
-            text=text,
-            ))
-
-        visibility = [False] * len(df)
-        visibility[i] = True
-        buttons.append(dict(
-            label=row["Name"],
-            method="update",
-            args=[{"visible": visibility}]
-        ))
 
-    fig.data[0].visible = True
+def generate_challenge_rating_by_size_fig(df: pd.DataFrame) -> go.Figure:
+    """
+    Generate a scatter plot of monster Challenge Rating with a dropdown
+    to highlight points by Size.
+    """
+    return _highlight_scatter_fig(
+        df, "Size", Config.SIZES,
+        "Monsters by <b>Challenge Rating</b> and <b>Size</b>")
+
+
+def generate_ability_radar_fig(df: pd.DataFrame,
+                               names: list = None) -> go.Figure:
+    """
+    Generate a radar plot of the ability scores of a monster with a dropdown
+    to select the monster.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        The data to plot.
+    names : list, optional
+        The names of the monsters in the dropdown, in order (for example,
+        the results of a `NameIndex` search). All monsters are listed, in the
+        order of the data, if omitted.
+    """
+    df = prepare_data(df)
+    if names is not None:
+        df = df.set_index("Name", drop=False).loc[names]
+
+    # A single trace is restyled by the buttons, so the size of the figure
+    # grows linearly with the number of monsters
+    theta = list(Config.ABILITIES + Config.ABILITIES[:1])
+    values = df[theta].values.tolist()
+    monster_names = df["Name"].tolist()
+
+    # The buttons share the structure of the first one, which is checked
+    # here, and are not validated one by one, since validating (and
+    # copying) tens of thousands of buttons is slower than everything else
+    # in the figure
+    buttons = [dict(label=name, method="restyle",
+                    args=[{"r": [r], "name": name}, [0]])
+               for name, r in zip(monster_names, values)]
+    go.layout.updatemenu.Button(buttons[0])
+
+    fig = go.Figure(_validate=False)
+    fig.add_trace(go.Scatterpolar(
+        theta=theta,
+        r=values[0],
+        marker={"color": Colors.MARKER_HIG_COLOR},
+        mode="lines+markers",
+        name=monster_names[0],
+        fill="toself",
+        line=dict(width=2),
+        hovertemplate="<b>%{fullData.name}</b><br>%{theta}: %{r}"
+                      "<extra></extra>",
+        ))
 
     fig.add_annotation(
             text="<b>Ability Scores</b> of Monsters",
             xref="paper", yref="paper",
             x=0.5, y=1.2,
             showarrow=False,
-            font=dict(size=14, color="black", family=config.FONT_STACK),
+            font=dict(size=14, color="black", family=Config.FONT_STACK),
             align="center",
             xanchor="center",
             borderpad=0,
@@ -479,7 +412,7 @@ def generate_ability_radar_fig(df: pd.DataFrame) -> None:
                  bgcolor=Colors.BUTTON_BG_COLOR,
                  bordercolor="black",
                  borderwidth=0,
-                 font=dict(family=config.FONT_STACK, size=12, color="black"),
+                 font=dict(family=Config.FONT_STACK, size=12, color="black"),
                  pad={"r": 0, "t": 0},
                  )
         ],
@@ -498,7 +431,7 @@ def generate_ability_radar_fig(df: pd.DataFrame) -> None:
                 showticklabels=True,
                 ticks='',
                 tickfont=dict(
-                    family=config.FONT_STACK,
+                    family=Config.FONT_STACK,
                     size=12,
                     color="black"),
                 gridcolor="black",
@@ -507,24 +440,17 @@ def generate_ability_radar_fig(df: pd.DataFrame) -> None:
         margin=dict(t=50, l=450, b=50, r=450),
         paper_bgcolor=Colors.BG_COLOR,
         plot_bgcolor=Colors.BG_COLOR,
-        width=config.WIDTH,
+        width=Config.WIDTH,
         height=300,
     )
 
-    fig.write_html(
-        "reports/html/monster_abilities_radar.html",
-        full_html=False, include_plotlyjs='cdn',
-        config={
-            "displayModeBar": False,
-        })
+    return fig
 
 
-def generate_alignment_fig(df: pd.DataFrame) -> None:
+def generate_alignment_fig(df: pd.DataFrame) -> go.Figure:
     """
     Generate a scatter plot of alignment by monsters types.
     """
-    config = Config()
-
     # Custom axis
     ax_lines = [[-1, -1.1, -1, -1.05],
                 [-1, -1.05, 1, -1.05],
@@ -548,9 +474,8 @@ def generate_alignment_fig(df: pd.DataFrame) -> None:
         "CHAOTIC<br>EVIL": (1 - 1/3, -1 + 1/3),
     }
 
-    # Calculate average stats
-    stat = df.groupby("Type")[["Alignment_EG", "Alignment_LC"]].mean()
-    stat.drop(labels=["Ooze"], inplace=True)
+    # Average alignments, without the Types that have no aligned monsters
+    stat = alignment_histograms(df).mean("Type").dropna()
     c = ["#a6cee3", "#1f78b4", "#b2df8a", "#33a02c", "#fb9a99", "#e31a1c",
          "#fdbf6f", "#ff7f00", "#cab2d6", "#6a3d9a", "#ffff99", "#b15928",
          "#999999"]
@@ -563,7 +488,7 @@ def generate_alignment_fig(df: pd.DataFrame) -> None:
             text=a, textposition='middle center', showlegend=False,
             textfont=dict(
                 size=12, color="gainsboro",
-                family=config.FONT_STACK, weight=800)))
+                family=Config.FONT_STACK, weight=800)))
     for i, (index, row) in enumerate(stat.iterrows()):
         fig.add_trace(go.Scatter(
             x=[row['Alignment_LC']],
@@ -571,7 +496,7 @@ def generate_alignment_fig(df: pd.DataFrame) -> None:
             mode='markers',
             name=index,
             marker=dict(
-                color=c[i],
+                color=c[i % len(c)],
                 size=10,
                 line=dict(width=1, color='white')
             ),
@@ -581,7 +506,7 @@ def generate_alignment_fig(df: pd.DataFrame) -> None:
         text="Monster <b>Types</b> by Average <b>Alignment</b>",
         xref="paper", yref="paper", x=0.5, y=1.03, showarrow=False,
         borderpad=0, align="center", xanchor="center", borderwidth=0,
-        font=dict(size=14, color="black", family=config.FONT_STACK))
+        font=dict(size=14, color="black", family=Config.FONT_STACK))
     for ax_line in ax_lines:
         fig.add_shape(
                 type="line",
@@ -599,7 +524,7 @@ def generate_alignment_fig(df: pd.DataFrame) -> None:
     fig.add_annotation(
         text="<b>Lawful</b> / <b>Chaotic</b>",
         xref="x", yref="y", x=0, y=-1.15, showarrow=False, borderpad=0,
-        font=dict(size=12, color="black", family=config.FONT_STACK),
+        font=dict(size=12, color="black", family=Config.FONT_STACK),
         align="center", xanchor="center", yanchor="middle", borderwidth=0)
     fig.add_annotation(
         dict(
@@ -618,7 +543,7 @@ def generate_alignment_fig(df: pd.DataFrame) -> None:
     fig.add_annotation(
         text="<b>Evil</b> / <b>Good</b>", textangle=-90,
         xref="x", yref="y", x=-1.15, y=0, showarrow=False, borderpad=0,
-        font=dict(size=12, color="black", family=config.FONT_STACK),
+        font=dict(size=12, color="black", family=Config.FONT_STACK),
         align="center", xanchor="center", yanchor="middle", borderwidth=0)
     fig.add_annotation(
         dict(
@@ -657,22 +582,166 @@ def generate_alignment_fig(df: pd.DataFrame) -> None:
         paper_bgcolor=Colors.BG_COLOR,
         plot_bgcolor=Colors.BG_COLOR,
         margin=dict(l=500, r=500, t=30, b=10),
-        width=config.WIDTH,
+        width=Config.WIDTH,
         height=440,
         )
 
-    fig.write_html(
-        "reports/html/monster_avg_alignment.html",
-        full_html=False, include_plotlyjs='cdn',
-        config={
-            "displayModeBar": False,
-            })
+    return fig
+
+
+def generate_alignment_heatmap_fig(df: pd.DataFrame) -> go.Figure:
+    """
+    Generate a heatmap of the alignments of the monsters with a dropdown to
+    select the monster type. Alignments such as "any" are spread over the
+    cells they allow.
+    """
+    histograms = alignment_histograms(df)
+    options = {"All": histograms.heatmaps().get("All", np.zeros((3, 3)))}
+    options.update(histograms.heatmaps("Type"))
+
+    fig = go.Figure()
+    fig.add_trace(go.Heatmap(
+        z=options["All"].tolist(),
+        x=["Lawful", "Neutral", "Chaotic"],
+        y=["Good", "Neutral", "Evil"],
+        zmin=0,
+        zmax=1,
+        colorscale=[[0, "white"], [1, Colors.MARKER_HIG_COLOR]],
+        showscale=False,
+        xgap=2,
+        ygap=2,
+        texttemplate="%{z:.0%}",
+        textfont=dict(family=Config.FONT_STACK, size=12),
+        hovertemplate="<b>%{x} %{y}</b>: %{z:.1%}<extra></extra>",
+        ))
+
+    buttons = []
+    for name, z in options.items():
+        buttons.append(dict(
+            label=name,
+            method="restyle",
+            args=[{"z": [z.tolist()]}, [0]]
+        ))
+
+    fig.add_annotation(
+        text="<b>Alignment</b> of Monsters",
+        xref="paper", yref="paper", x=0.5, y=1.1, showarrow=False,
+        borderpad=0, align="center", xanchor="center", borderwidth=0,
+        font=dict(size=14, color="black", family=Config.FONT_STACK))
+    fig.update_layout(
+        updatemenus=[
+            dict(buttons=buttons,
+                 direction="up",
+                 showactive=True,
+                 active=0,
+                 x=0.5,
+                 xanchor="center",
+                 y=-0.1,
+                 yanchor="top",
+                 bgcolor=Colors.BUTTON_BG_COLOR,
+                 bordercolor="black",
+                 borderwidth=0,
+                 font=dict(family=Config.FONT_STACK, size=12, color="black"),
+                 pad={"r": 0, "t": 0},
+                 )
+        ],
+        xaxis=dict(side="top", fixedrange=True, showgrid=False,
+                   tickfont=dict(family=Config.FONT_STACK, size=12)),
+        yaxis=dict(autorange="reversed", fixedrange=True, showgrid=False,
+                   tickfont=dict(family=Config.FONT_STACK, size=12)),
+        paper_bgcolor=Colors.BG_COLOR,
+        plot_bgcolor=Colors.BG_COLOR,
+        margin=dict(l=500, r=500, t=60, b=50),
+        width=Config.WIDTH,
+        height=360,
+        )
+
+    return fig
+
+
+# Name of each figure (also used as the output file stem) and its generator
+FIGURES = {
+    "monster_cr": generate_challenge_rating_fig,
+    "monster_cr_by_type": generate_challenge_rating_by_type_fig,
+    "monster_cr_by_size": generate_challenge_rating_by_size_fig,
+    "monster_abilities_radar": generate_ability_radar_fig,
+    "monster_avg_alignment": generate_alignment_fig,
+    "monster_alignment_heatmap": generate_alignment_heatmap_fig,
+}
+
+# Columns of the processed data read by each figure. Adding, removing or
+# reordering monsters affects every figure.
+_CR_SCATTER_INPUTS = {"Name", "ChallengeRating", "Type", "Size"}
+FIGURE_INPUTS = {
+    "monster_cr": _CR_SCATTER_INPUTS,
+    "monster_cr_by_type": _CR_SCATTER_INPUTS,
+    "monster_cr_by_size": _CR_SCATTER_INPUTS,
+    "monster_abilities_radar": {"Name", "Strength", "Dexterity",
+                                "Constitution", "Intelligence", "Wisdom",
+                                "Charisma"},
+    "monster_avg_alignment": {"Type", "Alignment"},
+    "monster_alignment_heatmap": {"Type", "Alignment"},
+}
+
+
+def affected_figures(columns: set) -> list:
+    """
+    Returns the names of the figures that read any of the given columns.
+
+    Parameters
+    ----------
+    columns : set
+        The names of the columns that changed.
+
+    Returns
+    -------
+    list
+        The names of the affected figures.
+    """
+    return [name for name, inputs in FIGURE_INPUTS.items()
+            if inputs & set(columns)]
+
+
+def build_figure(name: str, df: pd.DataFrame, as_json: bool = False):
+    """
+    Generates a figure without side effects.
+
+    Parameters
+    ----------
+    name : str
+        The name of the figure (a key of `FIGURES`).
+    df : pd.DataFrame
+        The data to plot.
+    as_json : bool, optional
+        If True, return the figure serialized as Plotly JSON bytes.
+
+    Returns
+    -------
+    go.Figure or bytes
+        The figure or its JSON serialization.
+    """
+    fig = FIGURES[name](df)
+    return fig_to_json(fig) if as_json else fig
+
+
+def render_figures(df: pd.DataFrame, sink, names: list = None) -> None:
+    """
+    Generates the figures and writes them to a sink.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        The data to plot.
+    sink : Sink
+        The sink that receives the figures (see `sinks.py`).
+    names : list, optional
+        The names of the figures to render. All figures are rendered if
+        omitted.
+    """
+    df = prepare_data(df)
+    for name in names if names is not None else FIGURES:
+        sink.write(name, FIGURES[name](df))
 
 
 if __name__ == "__main__":
-    df = _assign_grid_positions(read_data(), MAX_PER_ROW, CATEGORY_SPACING)
-    # generate_challenge_rating_fig(df)
-    # generate_challenge_rating_by_type_fig(df)
-    # generate_challenge_rating_by_size_fig(df)
-    # generate_ability_radar_fig(df)
-    generate_alignment_fig(df)
+    render_figures(read_data(), FileSink(FIGURES_DIR))
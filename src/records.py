@@ -0,0 +1,88 @@
+import sys
+from array import array
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+COLUMNS = ["Name", "ChallengeRating", "Type", "Size", "Strength", "Dexterity",
+           "Constitution", "Intelligence", "Wisdom", "Charisma", "Alignment",
+           "WalkSpeed", "SwimSpeed", "FlySpeed", "BurrowSpeed", "ClimbSpeed"]
+STR_COLUMNS = ["Name", "ChallengeRating", "Type", "Size", "Alignment"]
+INT_COLUMNS = [c for c in COLUMNS if c not in STR_COLUMNS]
+SPEED_COLUMNS = ["WalkSpeed", "SwimSpeed", "FlySpeed", "BurrowSpeed",
+                 "ClimbSpeed"]
+
+
+@dataclass(slots=True)
+class Monster:
+    """
+    The processed data of a single monster. The fields follow the order of
+    `COLUMNS`.
+    """
+    name: str
+    challenge_rating: str
+    type: str
+    size: str
+    strength: int
+    dexterity: int
+    constitution: int
+    intelligence: int
+    wisdom: int
+    charisma: int
+    alignment: str
+    walk_speed: int
+    swim_speed: int
+    fly_speed: int
+    burrow_speed: int
+    climb_speed: int
+
+
+# Name of the `Monster` field that holds each column
+FIELDS = dict(zip(COLUMNS, Monster.__slots__))
+
+
+class MonsterColumns:
+    """
+    A struct-of-arrays builder for the processed data. Integer columns are
+    appended to compact `array` buffers and string columns to lists of
+    interned strings, so no per-monster row objects are kept.
+    """
+    def __init__(self):
+        self._str = {c: [] for c in STR_COLUMNS}
+        self._int = {c: array("h") for c in INT_COLUMNS}
+
+    def __len__(self) -> int:
+        return len(self._str["Name"])
+
+    def append(self, monster: Monster) -> None:
+        """
+        Appends a monster to the columns.
+
+        Parameters
+        ----------
+        monster : Monster
+            The monster to append.
+        """
+        for c, values in self._str.items():
+            values.append(sys.intern(getattr(monster, FIELDS[c])))
+        for c, values in self._int.items():
+            values.append(getattr(monster, FIELDS[c]))
+
+    def to_frame(self) -> pd.DataFrame:
+        """
+        Builds a data frame with the columns in `COLUMNS`.
+
+        Returns
+        -------
+        pd.DataFrame
+            The processed data.
+        """
+        columns = {}
+        for c in COLUMNS:
+            if c in self._str:
+                columns[c] = pd.Series(self._str[c], dtype=str)
+            else:
+                columns[c] = np.frombuffer(
+                    self._int[c], dtype=np.int16).astype(np.int64)
+        return pd.DataFrame(columns)
@@ -0,0 +1,205 @@
+import numpy as np
+
+from paths import INDEX_PATH
+
+
+def normalize_name(name: str) -> str:
+    """
+    Normalizes a monster name for searching: lower case, without spaces or
+    punctuation (so that "Were Bear" and "werebear" match).
+
+    Parameters
+    ----------
+    name : str
+        The name to normalize.
+
+    Returns
+    -------
+    str
+        The normalized name.
+    """
+    return "".join(c for c in name.lower() if c.isalnum())
+
+
+def _trigrams(s: str) -> set:
+    s = f"  {s} "
+    return {s[i:i + 3] for i in range(len(s) - 2)}
+
+
+def edit_distance(a: str, b: str) -> int:
+    """
+    Calculates the Levenshtein distance between two strings.
+
+    Parameters
+    ----------
+    a : str
+        The first string.
+    b : str
+        The second string.
+
+    Returns
+    -------
+    int
+        The minimum number of insertions, deletions and substitutions that
+        turn `a` into `b`.
+    """
+    if len(a) < len(b):
+        a, b = b, a
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(previous[j] + 1,
+                               current[j - 1] + 1,
+                               previous[j - 1] + (ca != cb)))
+        previous = current
+    return previous[-1]
+
+
+class NameIndex:
+    """
+    A trigram inverted index over monster names for fuzzy search and prefix
+    autocomplete. The postings are stored in CSR form: the ids of the names
+    that contain the trigram `keys[k]` are `ids[offsets[k]:offsets[k + 1]]`.
+    """
+    def __init__(self, names: np.ndarray, normalized: np.ndarray,
+                 keys: np.ndarray, offsets: np.ndarray, ids: np.ndarray,
+                 order: np.ndarray):
+        self.names = names
+        self.normalized = normalized
+        self.keys = keys
+        self.offsets = offsets
+        self.ids = ids
+        self.order = order
+        self._sorted = normalized[order]
+        self._lookup = {key: k for k, key in enumerate(keys.tolist())}
+
+    @classmethod
+    def build(cls, names) -> "NameIndex":
+        """
+        Builds the index.
+
+        Parameters
+        ----------
+        names : iterable of str
+            The monster names, e.g. the `Name` column of the processed data.
+
+        Returns
+        -------
+        NameIndex
+            The index.
+        """
+        names = np.asarray(list(names), dtype=str)
+        normalized = np.array([normalize_name(n) for n in names], dtype=str)
+
+        postings = {}
+        for i, name in enumerate(normalized.tolist()):
+            for gram in _trigrams(name):
+                postings.setdefault(gram, []).append(i)
+        keys = sorted(postings)
+        lengths = [len(postings[key]) for key in keys]
+        offsets = np.zeros(len(keys) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        ids = np.fromiter(
+            (i for key in keys for i in postings[key]),
+            dtype=np.int32, count=offsets[-1])
+
+        return cls(names, normalized, np.array(keys, dtype=str), offsets, ids,
+                   np.argsort(normalized, kind="stable"))
+
+    def save(self, path: str = INDEX_PATH) -> None:
+        """
+        Saves the index to a NumPy `.npz` file.
+
+        Parameters
+        ----------
+        path : str, optional
+            The path of the file.
+        """
+        with open(path, "wb") as file:
+            np.savez(file, names=self.names, normalized=self.normalized,
+                     keys=self.keys, offsets=self.offsets, ids=self.ids,
+                     order=self.order)
+
+    @classmethod
+    def load(cls, path: str = INDEX_PATH) -> "NameIndex":
+        """
+        Loads an index saved with `save`.
+
+        Parameters
+        ----------
+        path : str, optional
+            The path of the file.
+
+        Returns
+        -------
+        NameIndex
+            The index.
+        """
+        with np.load(path) as arrays:
+            return cls(**{key: arrays[key] for key in arrays.files})
+
+    def search(self, query: str, limit: int = 5,
+               max_candidates: int = 50) -> list:
+        """
+        Finds the names closest to a (possibly misspelled) query.
+
+        The names that share the most trigrams with the query are kept as
+        candidates and then ranked by edit distance to the query.
+
+        Parameters
+        ----------
+        query : str
+            The query.
+        limit : int, optional
+            The maximum number of results.
+        max_candidates : int, optional
+            The number of candidates ranked by edit distance.
+
+        Returns
+        -------
+        list
+            The matching names, best match first.
+        """
+        query = normalize_name(query)
+        postings = [
+            self.ids[self.offsets[k]:self.offsets[k + 1]]
+            for k in (self._lookup.get(g) for g in _trigrams(query))
+            if k is not None]
+        if not postings:
+            return []
+
+        counts = np.bincount(np.concatenate(postings),
+                             minlength=len(self.names))
+        n_candidates = min(max_candidates, np.count_nonzero(counts))
+        candidates = np.argpartition(-counts, n_candidates - 1)[
+            :n_candidates]
+
+        ranked = sorted(
+            candidates.tolist(),
+            key=lambda i: (edit_distance(query, self.normalized[i]),
+                           -counts[i], i))
+        return [str(self.names[i]) for i in ranked[:limit]]
+
+    def complete(self, prefix: str, limit: int = 10) -> list:
+        """
+        Finds the names that start with a prefix, in alphabetical order.
+
+        Parameters
+        ----------
+        prefix : str
+            The prefix.
+        limit : int, optional
+            The maximum number of results.
+
+        Returns
+        -------
+        list
+            The matching names.
+        """
+        prefix = normalize_name(prefix)
+        start = np.searchsorted(self._sorted, prefix, side="left")
+        stop = np.searchsorted(self._sorted, prefix + "\U0010ffff",
+                               side="left")
+        stop = min(stop, start + limit)
+        return [str(self.names[i]) for i in self.order[start:stop]]
@@ -0,0 +1,137 @@
+import json
+import os
+import threading
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import plotly.graph_objects as go
+
+
+def fig_to_html(fig: "go.Figure") -> str:
+    """
+    Serializes a figure to the HTML snippet embedded in the blog post.
+
+    Parameters
+    ----------
+    fig : go.Figure
+        The figure to serialize.
+
+    Returns
+    -------
+    str
+        The HTML snippet.
+    """
+    return fig.to_html(
+        full_html=False, include_plotlyjs='cdn',
+        config={
+            "displayModeBar": False,
+        })
+
+
+def fig_to_json(fig: "go.Figure") -> bytes:
+    """
+    Serializes a figure to Plotly JSON.
+
+    Parameters
+    ----------
+    fig : go.Figure
+        The figure to serialize.
+
+    Returns
+    -------
+    bytes
+        The UTF-8 encoded JSON of the figure.
+    """
+    return fig.to_json().encode("utf-8")
+
+
+def serialize(fig: "go.Figure", fmt: str) -> bytes:
+    """
+    Serializes a figure to `html` or `json`.
+
+    Parameters
+    ----------
+    fig : go.Figure
+        The figure to serialize.
+    fmt : str
+        The output format, either `html` or `json`.
+
+    Returns
+    -------
+    bytes
+        The serialized figure.
+    """
+    if fmt == "html":
+        return fig_to_html(fig).encode("utf-8")
+    if fmt == "json":
+        return fig_to_json(fig)
+    raise ValueError(f"Unknown figure format `{fmt}`.")
+
+
+def atomic_write(path: str, payload: bytes) -> None:
+    """
+    Writes a file through a temporary file and a rename, so readers never
+    see a partially written file.
+
+    Parameters
+    ----------
+    path : str
+        The path of the file.
+    payload : bytes
+        The content of the file.
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "wb") as file:
+        file.write(payload)
+    os.replace(tmp_path, path)
+
+
+class FileSink:
+    """
+    Writes each figure to `<directory>/<name>.<fmt>`.
+    """
+    def __init__(self, directory: str, fmt: str = "html"):
+        self.directory = directory
+        self.fmt = fmt
+
+    def path(self, name: str) -> str:
+        return os.path.join(self.directory, f"{name}.{self.fmt}")
+
+    def write(self, name: str, fig: "go.Figure") -> None:
+        atomic_write(self.path(name), serialize(fig, self.fmt))
+
+
+class StreamSink:
+    """
+    Writes each figure to a binary stream as a JSON line with its `name`
+    and its serialized `payload`, so figures whose payload spans several
+    lines (e.g. HTML) can be read back one line at a time.
+    """
+    def __init__(self, stream, fmt: str = "json"):
+        self.stream = stream
+        self.fmt = fmt
+        self._lock = threading.Lock()
+
+    def write(self, name: str, fig: "go.Figure") -> None:
+        record = json.dumps({
+            "name": name,
+            "payload": serialize(fig, self.fmt).decode("utf-8"),
+        }).encode("utf-8")
+        with self._lock:
+            self.stream.write(record + b"\n")
+
+
+class MemorySink:
+    """
+    Keeps the serialized figures in the `payloads` dictionary, keyed by name.
+    """
+    def __init__(self, fmt: str = "json"):
+        self.fmt = fmt
+        self.payloads = {}
+        self._lock = threading.Lock()
+
+    def write(self, name: str, fig: "go.Figure") -> None:
+        payload = serialize(fig, self.fmt)
+        with self._lock:
+            self.payloads[name] = payload
@@ -0,0 +1,150 @@
+import hashlib
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from search import normalize_name
+from validation import validate_blocks
+
+SOURCE_EXTENSION = ".json"
+REPORT_COLUMNS = ["Source", "Index", "Name", "Rejected", "Reasons"]
+
+
+def expand_paths(paths: list) -> list:
+    """
+    Lists the raw data files of the given files and directories.
+
+    Parameters
+    ----------
+    paths : list
+        Raw data files, or directories whose JSON files (in any
+        subdirectory) are raw data files.
+
+    Returns
+    -------
+    list
+        The files, in the order given and, within each directory, sorted by
+        path. Files listed more than once are only kept the first time.
+    """
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            found = []
+            for root, _, names in os.walk(path):
+                found += [os.path.join(root, name) for name in names
+                          if name.lower().endswith(SOURCE_EXTENSION)]
+            files += sorted(found)
+        else:
+            files.append(path)
+    return list(dict.fromkeys(os.path.normpath(f) for f in files))
+
+
+def read_source(path: str) -> list:
+    """
+    Reads the monster blocks of a raw data file.
+
+    Parameters
+    ----------
+    path : str
+        The path of the JSON file.
+
+    Returns
+    -------
+    list
+        The raw monster blocks.
+    """
+    with open(path, "rb") as file:
+        monsters = json.loads(file.read())
+    if not isinstance(monsters, list):
+        raise ValueError(f"`{path}` does not hold a list of monster blocks")
+    return monsters
+
+
+def _read_or_error(path: str) -> tuple:
+    # Errors are returned rather than raised, so one unreadable file does
+    # not stop the merge of the others
+    try:
+        return read_source(path), None
+    except (OSError, ValueError) as error:
+        return [], error
+
+
+def stat_hash(block: dict) -> bytes:
+    """
+    Returns a hash of all the fields of a monster block other than the
+    name, so blocks that differ anywhere else (e.g. in their Actions) are
+    not duplicates.
+
+    Parameters
+    ----------
+    block : dict
+        The raw monster block.
+
+    Returns
+    -------
+    bytes
+        The digest.
+    """
+    payload = json.dumps({k: v for k, v in block.items() if k != "name"},
+                         sort_keys=True, ensure_ascii=False)
+    return hashlib.blake2b(payload.encode("utf-8"), digest_size=16).digest()
+
+
+def merge_sources(paths: list, max_workers: int = 8) -> tuple:
+    """
+    Reads several raw data files concurrently and merges their valid
+    monster blocks. A monster whose normalized name and other fields (see
+    `stat_hash`) are already in an earlier source (or earlier in the same
+    source) is dropped. Files that cannot be read or do not hold a list of
+    blocks are skipped and reported with the `Index` -1.
+
+    Parameters
+    ----------
+    paths : list
+        The raw data files or directories (see `expand_paths`).
+    max_workers : int, optional
+        The number of threads that read the files.
+
+    Returns
+    -------
+    tuple
+        The merged monster blocks, the source file of each block, the
+        validation report of all the sources (see `validate_blocks`) with
+        the `Source` of each block and the number of duplicates dropped.
+    """
+    files = expand_paths(paths)
+    monsters, origins, reports = [], [], []
+    seen = set()
+    n_duplicates = 0
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        # The files are read ahead while earlier ones are merged, in order,
+        # so the first source of a monster always wins
+        for path, (blocks, error) in zip(
+                files, pool.map(_read_or_error, files)):
+            if error is not None:
+                reports.append(pd.DataFrame(
+                    [[path, -1, "", True, f"unreadable source: {error}"]],
+                    columns=REPORT_COLUMNS))
+                continue
+            valid, errors = validate_blocks(blocks)
+            errors.insert(0, "Source", path)
+            reports.append(errors)
+            for i in np.flatnonzero(valid):
+                block = blocks[i]
+                key = (normalize_name(block["name"]), stat_hash(block))
+                if key in seen:
+                    n_duplicates += 1
+                    continue
+                seen.add(key)
+                monsters.append(block)
+                origins.append(path)
+
+    if reports:
+        errors = pd.concat(reports, ignore_index=True)
+    else:
+        errors = pd.DataFrame(columns=REPORT_COLUMNS)
+    return monsters, origins, errors, n_duplicates
@@ -0,0 +1,303 @@
+import json
+
+import numpy as np
+import pandas as pd
+
+from config import Config
+from records import COLUMNS, SPEED_COLUMNS
+from validation import ABILITY_FIELDS
+
+# Experience points awarded for each Challenge Rating, in the order of
+# `Config.CHALLENGE_RATINGS`
+XP = (10, 25, 50, 100, 200, 450, 700, 1100, 1800, 2300, 2900, 3900, 5000,
+      5900, 7200, 8400, 10000, 11500, 13000, 15000, 18000, 20000, 22000,
+      25000, 33000, 41000, 50000, 62000, 75000, 90000, 105000, 120000,
+      135000, 155000)
+
+
+def _sample_conditional(rng: np.random.Generator, given: np.ndarray,
+                        probs: np.ndarray) -> np.ndarray:
+    """
+    Samples one category per element of `given`, where `probs[k]` is the
+    distribution of the categories for the elements equal to `k`.
+    """
+    out = np.empty(len(given), dtype=np.int64)
+    for k in range(len(probs)):
+        mask = given == k
+        out[mask] = rng.choice(probs.shape[1], size=mask.sum(), p=probs[k])
+    return out
+
+
+def _sample_rows(rng: np.random.Generator, given: np.ndarray,
+                 rows: list) -> np.ndarray:
+    """
+    Picks, for each element of `given`, one of the rows in `rows[k]` where
+    `k` is the value of the element.
+    """
+    out = np.empty(len(given), dtype=np.int64)
+    for k, candidates in enumerate(rows):
+        mask = given == k
+        out[mask] = candidates[rng.integers(len(candidates), size=mask.sum())]
+    return out
+
+
+class BestiaryModel:
+    """
+    A generative model of monsters fitted to the processed data:
+
+    - The Type follows the observed frequencies.
+    - The Challenge Rating and the Size follow their observed distributions
+      for each Type, mixed with those of all the monsters.
+    - The ability scores follow a multivariate normal distribution whose mean
+      is linear in the Challenge Rating and the Size, with coefficients for
+      each Type shrunk towards the pooled ones (as in
+      `analysis.CRRegression`), and whose covariance is that of the
+      residuals, so the correlations between abilities are kept.
+    - The speeds and the alignment are copied from random monsters of the
+      same Type, which keeps realistic combinations (e.g. walk and fly).
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        The data, as returned by `read_data`.
+    smoothing : float, optional
+        The weight of the distributions of all the monsters relative to
+        those of each Type. It is proportional to the number of monsters of
+        the Type, so rare Types are not flattened more than common ones.
+    shrinkage : float, optional
+        The strength of the pull of each Type's ability coefficients towards
+        the pooled ones, in monsters.
+    """
+    def __init__(self, df: pd.DataFrame, smoothing: float = 0.05,
+                 shrinkage: float = 1.0):
+        # Monsters of types that are not in the config (kept with a warning
+        # by the validation) have no category to be sampled in
+        df = df[df["Type"].isin(Config.MONSTER_TYPES)]
+        types = df["Type"].map(Config.TYPE_TO_INT).to_numpy()
+        sizes = df["Size"].map(Config.SIZE_TO_INT).to_numpy()
+        crs = df["ChallengeRatingInt"].to_numpy()
+        n_types = len(Config.MONSTER_TYPES)
+
+        self.type_probs = np.bincount(types, minlength=n_types) / len(df)
+        self.cr_probs = self._conditional_probs(
+            types, crs, n_types, len(Config.CHALLENGE_RATINGS), smoothing)
+        self.size_probs = self._conditional_probs(
+            types, sizes, n_types, len(Config.SIZES), smoothing)
+
+        abilities = df[list(Config.ABILITIES)].to_numpy(dtype=float)
+        design = self._design(crs, sizes)
+        self.coefs = self._type_coefs(design, abilities, types, n_types,
+                                      shrinkage)
+        residuals = abilities - np.einsum("ip,ipa->ia", design,
+                                          self.coefs[types])
+        self.chol = np.linalg.cholesky(np.cov(residuals, rowvar=False))
+
+        # Types without monsters borrow from all the monsters
+        everyone = np.arange(len(df))
+        self.type_rows = [np.flatnonzero(types == k) for k in range(n_types)]
+        self.type_rows = [r if len(r) else everyone for r in self.type_rows]
+        self.speeds = df[SPEED_COLUMNS].to_numpy(dtype=np.int64)
+        self.alignments = df["Alignment"].to_numpy(dtype=object)
+
+    @staticmethod
+    def _conditional_probs(given: np.ndarray, values: np.ndarray,
+                           n_given: int, n_values: int,
+                           smoothing: float) -> np.ndarray:
+        counts = np.zeros((n_given, n_values))
+        np.add.at(counts, (given, values), 1)
+        pooled = counts.sum(axis=0) / counts.sum()
+        totals = counts.sum(axis=1, keepdims=True)
+        counts += smoothing * totals * pooled
+        # Categories without monsters follow the pooled distribution
+        return np.divide(counts, (1 + smoothing) * totals,
+                         out=np.tile(pooled, (n_given, 1)), where=totals > 0)
+
+    @staticmethod
+    def _type_coefs(design: np.ndarray, abilities: np.ndarray,
+                    types: np.ndarray, n_types: int,
+                    shrinkage: float) -> np.ndarray:
+        p = design.shape[1]
+        xtx = np.zeros((n_types, p, p))
+        xty = np.zeros((n_types, p, abilities.shape[1]))
+        for k in range(n_types):
+            mask = types == k
+            xtx[k] = design[mask].T @ design[mask]
+            xty[k] = design[mask].T @ abilities[mask]
+        pooled, *_ = np.linalg.lstsq(design, abilities, rcond=None)
+        penalty = shrinkage * np.eye(p)
+        return np.linalg.solve(xtx + penalty, xty + penalty @ pooled)
+
+    @staticmethod
+    def _design(crs: np.ndarray, sizes: np.ndarray) -> np.ndarray:
+        size_dummies = np.eye(len(Config.SIZES))[sizes][:, 1:]
+        return np.column_stack([np.ones(len(crs)), crs, size_dummies])
+
+    def sample(self, n: int, rng: np.random.Generator,
+               start: int = 0) -> pd.DataFrame:
+        """
+        Samples monsters in the format of the processed data.
+
+        Parameters
+        ----------
+        n : int
+            The number of monsters.
+        rng : np.random.Generator
+            The random number generator.
+        start : int, optional
+            The number of the first monster, used for the names.
+
+        Returns
+        -------
+        pd.DataFrame
+            The monsters, with the columns in `COLUMNS`.
+        """
+        types = rng.choice(len(self.type_probs), size=n, p=self.type_probs)
+        crs = _sample_conditional(rng, types, self.cr_probs)
+        sizes = _sample_conditional(rng, types, self.size_probs)
+
+        noise = rng.standard_normal((n, len(Config.ABILITIES))) @ self.chol.T
+        abilities = np.einsum("ip,ipa->ia", self._design(crs, sizes),
+                              self.coefs[types]) + noise
+        abilities = np.clip(np.rint(abilities), 1, 30).astype(np.int64)
+
+        speeds = self.speeds[_sample_rows(rng, types, self.type_rows)]
+        alignments = self.alignments[_sample_rows(rng, types, self.type_rows)]
+
+        df = pd.DataFrame({
+            "Name": [f"Monster{i}" for i in range(start, start + n)],
+            "ChallengeRating": np.array(Config.CHALLENGE_RATINGS)[crs],
+            "Type": np.array(Config.MONSTER_TYPES)[types],
+            "Size": np.array(Config.SIZES)[sizes],
+            "Alignment": alignments,
+        })
+        df[list(Config.ABILITIES)] = abilities
+        df[SPEED_COLUMNS] = speeds
+        return df[COLUMNS]
+
+
+def iter_frames(model: BestiaryModel, n: int, seed: int = 42,
+                chunk_size: int = 1_000_000):
+    """
+    Generates synthetic monsters in chunks, so the memory used does not
+    depend on `n`. The output only depends on `seed` and `chunk_size`.
+
+    Parameters
+    ----------
+    model : BestiaryModel
+        The fitted model.
+    n : int
+        The total number of monsters.
+    seed : int, optional
+        The seed of the random number generator.
+    chunk_size : int, optional
+        The maximum number of monsters per chunk.
+
+    Yields
+    ------
+    pd.DataFrame
+        The chunks, in the format of the processed data.
+    """
+    n_chunks = -(-n // chunk_size)
+    seeds = np.random.SeedSequence(seed).spawn(n_chunks)
+    for i, chunk_seed in enumerate(seeds):
+        start = i * chunk_size
+        yield model.sample(min(chunk_size, n - start),
+                           np.random.default_rng(chunk_seed), start)
+
+
+def _speed_string(walk: int, swim: int, fly: int, burrow: int,
+                  climb: int) -> str:
+    parts = [f"{walk} ft."]
+    for kind, value in (("swim", swim), ("fly", fly), ("burrow", burrow),
+                        ("climb", climb)):
+        if value:
+            parts.append(f"{kind} {value} ft.")
+    return ", ".join(parts) + " "
+
+
+def frame_to_blocks(df: pd.DataFrame) -> list:
+    """
+    Converts processed monsters to raw monster blocks with the fields read
+    by the parser.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        The monsters, in the format of the processed data.
+
+    Returns
+    -------
+    list
+        The raw monster blocks.
+    """
+    xp = dict(zip(Config.CHALLENGE_RATINGS, XP))
+    abilities = df[list(Config.ABILITIES)].to_numpy()
+    mods = abilities // 2 - 5
+    blocks = []
+    for row, scores, scores_mods, speeds in zip(
+            df.itertuples(index=False), abilities, mods,
+            df[SPEED_COLUMNS].to_numpy()):
+        block = {
+            "name": row.Name,
+            "meta": f"{row.Size} {row.Type.lower()}, {row.Alignment}",
+            "Speed": _speed_string(*speeds.tolist()),
+        }
+        for field, score, mod in zip(ABILITY_FIELDS, scores.tolist(),
+                                     scores_mods.tolist()):
+            block[field] = str(score)
+            block[f"{field}_mod"] = f"({mod:+d})"
+        block["Challenge"] = (
+            f"{row.ChallengeRating} ({xp[row.ChallengeRating]:,} XP)")
+        blocks.append(block)
+    return blocks
+
+
+def write_csv(model: BestiaryModel, path: str, n: int, seed: int = 42,
+              chunk_size: int = 1_000_000) -> None:
+    """
+    Writes synthetic monsters in the format of the processed data CSV.
+
+    Parameters
+    ----------
+    model : BestiaryModel
+        The fitted model.
+    path : str
+        The path of the CSV file.
+    n : int
+        The number of monsters.
+    seed : int, optional
+        The seed of the random number generator.
+    chunk_size : int, optional
+        The number of monsters held in memory at once.
+    """
+    with open(path, "w", newline="") as file:
+        for i, df in enumerate(iter_frames(model, n, seed, chunk_size)):
+            df.to_csv(file, index=False, header=i == 0)
+
+
+def write_json(model: BestiaryModel, path: str, n: int, seed: int = 42,
+               chunk_size: int = 100_000) -> None:
+    """
+    Writes synthetic monsters in the format of the raw data JSON.
+
+    Parameters
+    ----------
+    model : BestiaryModel
+        The fitted model.
+    path : str
+        The path of the JSON file.
+    n : int
+        The number of monsters.
+    seed : int, optional
+        The seed of the random number generator.
+    chunk_size : int, optional
+        The number of monsters held in memory at once.
+    """
+    with open(path, "w") as file:
+        file.write("[")
+        first = True
+        for df in iter_frames(model, n, seed, chunk_size):
+            for block in frame_to_blocks(df):
+                file.write(("\n" if first else ",\n") + json.dumps(block))
+                first = False
+        file.write("\n]\n")
@@ -0,0 +1,142 @@
+import re
+
+import numpy as np
+import pandas as pd
+
+from alignment import alignment_distribution
+from config import Config
+
+ABILITY_FIELDS = ["STR", "DEX", "CON", "INT", "WIS", "CHA"]
+# Fields of the raw monster blocks read by `parse_monster_block`
+BLOCK_FIELDS = ["name", "meta", "Challenge", "Speed"] + ABILITY_FIELDS
+# The labeled and unlabeled (walking) speeds read by `parse_speed_line`
+SPEED_PATTERN = re.compile(r"(?:(swim|fly|burrow|climb) )?(\d+) ft")
+
+_META = re.compile(r"(\S+) ([^,\s]+)[^,]*, (.+)")
+_SPEED = re.compile(r"\d+ ft")
+_LONG_SPEED = re.compile(r"\d{5,} ft")
+_ABILITY = re.compile(r"\d{1,2}")
+
+
+def _check_name(name: str) -> tuple:
+    return ("" if name.strip() else "empty `name`"), ""
+
+
+def _known_alignment(alignment: str) -> bool:
+    # The alignments that the alignment figures place on the grid. Others
+    # only get a warning, as the parser accepts any alignment.
+    return alignment.lower() == "unaligned" \
+        or alignment_distribution(alignment)[-1] < 1
+
+
+def _check_meta(meta: str) -> tuple:
+    match = _META.fullmatch(meta)
+    if match is None:
+        return "malformed `meta`", ""
+    size, monster_type, alignment = match.groups()
+    # Unknown sizes are rejected because the Size feeds the models (see
+    # `analysis.py` and `synthetic.py`). Unknown types (e.g. "swarm") and
+    # alignments are parsed without trouble, so they are only reported.
+    error = "" if size in Config.SIZES else f"unknown size `{size}`"
+    warnings = []
+    if monster_type.title() not in Config.MONSTER_TYPES:
+        warnings.append(f"unknown type `{monster_type}`")
+    if not _known_alignment(alignment):
+        warnings.append(f"unknown alignment `{alignment}`")
+    return error, "; ".join(warnings)
+
+
+def _check_challenge(challenge: str) -> tuple:
+    cr = challenge.split(" (")[0]
+    if cr not in Config.CHALLENGE_RATINGS:
+        return f"unknown challenge rating `{cr}`", ""
+    return "", ""
+
+
+def _check_speed(speed: str) -> tuple:
+    if _SPEED.search(speed) is None:
+        return "malformed `Speed`", ""
+    if _LONG_SPEED.search(speed) is not None:
+        return "speed out of range", ""
+    # Segments the parser would skip (e.g. "swim 40ft.") lose a speed
+    skipped = [s.strip() for s in speed.split(",")
+               if "ft" in s and SPEED_PATTERN.search(s) is None]
+    return "", "; ".join(f"unparsed speed `{s}`" for s in skipped)
+
+
+def _is_ability_score(value: str) -> bool:
+    return _ABILITY.fullmatch(value) is not None and 1 <= int(value) <= 30
+
+
+def _field_reasons(values: list, field: str) -> tuple:
+    """
+    Returns the reason to reject each value of a field and the warnings
+    about it (empty strings if there are none). The checks run once per
+    distinct value, which is cheap because the fields read by the parser
+    repeat heavily across monsters.
+    """
+    if field in ABILITY_FIELDS:
+        def check(value):
+            if _is_ability_score(value):
+                return "", ""
+            return f"invalid `{field}`", ""
+    else:
+        check = {"name": _check_name, "meta": _check_meta,
+                 "Challenge": _check_challenge, "Speed": _check_speed}[field]
+
+    # Missing values get the code -1, i.e. the last reason. Values that
+    # are not strings were replaced by their type.
+    codes, uniques = pd.factorize(pd.Series(values, dtype=object))
+    results = [check(u) if type(u) is str
+               else (f"non-string `{field}` ({u.__name__})", "")
+               for u in uniques] + [(f"missing `{field}`", "")]
+    results = np.array(results, dtype=object).reshape(-1, 2)
+    return results[codes, 0], results[codes, 1]
+
+
+def validate_blocks(monsters: list) -> tuple:
+    """
+    Checks a batch of raw monster blocks before parsing. Only the problems
+    that would break the parser reject a block; values that parse but are
+    not in the config (e.g. an unknown type) are reported as warnings.
+
+    Parameters
+    ----------
+    monsters : list
+        The raw monster blocks.
+
+    Returns
+    -------
+    tuple
+        A boolean array that is True for the blocks that can be parsed and
+        a data frame with the `Index`, `Name`, `Rejected` flag and `Reasons`
+        of the blocks that were rejected or got warnings.
+    """
+    is_dict = np.array([type(m) is dict for m in monsters], dtype=bool)
+    blocks = [m if ok else {} for m, ok in zip(monsters, is_dict)]
+
+    errors = np.empty((len(monsters), len(BLOCK_FIELDS)), dtype=object)
+    warnings = np.empty_like(errors)
+    for j, field in enumerate(BLOCK_FIELDS):
+        values = [b.get(field) for b in blocks]
+        if field in ABILITY_FIELDS:
+            # The parser reads the scores with `int`, so JSON integers work
+            values = [str(v) if type(v) is int else v for v in values]
+        # Other values that are not strings (e.g. lists, which cannot be
+        # factorized) are replaced by their type, to be reported as such
+        values = [v if v is None or type(v) is str else type(v)
+                  for v in values]
+        errors[:, j], warnings[:, j] = _field_reasons(values, field)
+
+    bad = ~is_dict | (errors != "").any(axis=1)
+    index = np.flatnonzero(bad | (warnings != "").any(axis=1))
+    report = pd.DataFrame({
+        "Index": index,
+        "Name": [blocks[i].get("name", "") for i in index],
+        "Rejected": bad[index],
+        "Reasons": [
+            "; ".join(r for r in (*errors[i], *warnings[i]) if r)
+            if is_dict[i] else "not a monster block"
+            for i in index],
+    })
+    return ~bad, report
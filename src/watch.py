@@ -0,0 +1,275 @@
+import importlib
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+import colors
+import config
+import data
+import plots
+import search
+import sinks
+import validation
+from paths import (ERRORS_PATH, FIGURES_DIR, INDEX_PATH, PROCESSED_PATH,
+                   RAW_PATH)
+from records import COLUMNS
+
+SRC_DIR = os.path.dirname(os.path.abspath(__file__))
+SETTINGS_FILES = [os.path.join(SRC_DIR, "config.py"),
+                  os.path.join(SRC_DIR, "colors.py")]
+
+
+def _block_key(block: dict) -> tuple:
+    """
+    Returns a key that changes whenever a field read by the parser changes.
+    Edits to other fields (e.g. `Traits`) do not change the key.
+    """
+    return tuple(map(block.get, validation.BLOCK_FIELDS))
+
+
+class Pipeline:
+    """
+    Keeps the processed data in memory and, on each update, re-parses only
+    the monster blocks that changed and re-renders only the figures whose
+    inputs changed.
+    """
+    def __init__(self, raw_path: str = RAW_PATH,
+                 processed_path: str = PROCESSED_PATH,
+                 index_path: str = INDEX_PATH,
+                 errors_path: str = ERRORS_PATH,
+                 sink=None):
+        self.raw_path = raw_path
+        self.processed_path = processed_path
+        self.index_path = index_path
+        self.errors_path = errors_path
+        self.sink = sink if sink is not None else sinks.FileSink(
+            FIGURES_DIR)
+        self.keys = []
+        self.df = None
+        # The report rows of the warned blocks in the data, by block key,
+        # so blocks that are not checked again keep their warnings
+        self.warnings = {}
+
+    def _check_store(self) -> None:
+        """
+        Refuses to replace a processed CSV merged from several sources (see
+        `sources.py`), which the pipeline cannot rebuild from `raw_path`
+        alone.
+        """
+        try:
+            columns = pd.read_csv(self.processed_path, nrows=0).columns
+        except FileNotFoundError:
+            return
+        if "Source" in columns:
+            raise ValueError(
+                f"`{self.processed_path}` was merged from several sources "
+                f"and would be overwritten; watch another processed path or "
+                f"rebuild it with `cli.py process` first.")
+
+    def _load(self) -> list:
+        with open(self.raw_path, "r") as file:
+            return json.load(file)
+
+    def _validate(self, monsters: list, keys: list, positions: list) -> list:
+        """
+        Validates the blocks at the given positions, saves the error report
+        and returns the positions of all the blocks but the invalid ones.
+        The other blocks keep the warnings found when they were checked.
+        """
+        valid, errors = validation.validate_blocks(
+            [monsters[i] for i in positions])
+        errors["Index"] = np.asarray(positions, dtype=int)[errors["Index"]]
+
+        checked = set(positions)
+        carried = pd.DataFrame(
+            [[i, *self.warnings[key]] for i, key in enumerate(keys)
+             if i not in checked and key in self.warnings],
+            columns=["Index", "Name", "Reasons"])
+        carried.insert(2, "Rejected", False)
+        warned = pd.concat([errors[~errors["Rejected"]], carried])
+        self.warnings = {keys[i]: (name, reasons) for i, name, reasons in zip(
+            warned["Index"], warned["Name"], warned["Reasons"])}
+
+        if len(carried):
+            errors = pd.concat([errors, carried], ignore_index=True)
+            errors = errors.sort_values("Index", kind="stable")
+        errors.to_csv(self.errors_path, index=False)
+        invalid = set(errors.loc[errors["Rejected"], "Index"].tolist())
+        return [i for i in range(len(monsters)) if i not in invalid]
+
+    def _parse(self, monsters: list) -> pd.DataFrame:
+        return data.add_derived_columns(data.monsters_to_frame(monsters))
+
+    def _save(self, names_changed: bool = True) -> None:
+        self.df[COLUMNS].to_csv(self.processed_path, index=False)
+        if names_changed:
+            search.NameIndex.build(self.df["Name"]).save(self.index_path)
+
+    def _render(self, names: list) -> None:
+        if names:
+            plots.render_figures(self.df, self.sink, names)
+
+    def build(self) -> list:
+        """
+        Processes all the monsters and renders all the figures.
+
+        Returns
+        -------
+        list
+            The names of the rendered figures.
+        """
+        self._check_store()
+        monsters = self._load()
+        keys = [_block_key(m) if isinstance(m, dict) else None
+                for m in monsters]
+        kept = self._validate(monsters, keys, range(len(monsters)))
+        monsters = [monsters[i] for i in kept]
+        self.keys = [keys[i] for i in kept]
+        self.df = self._parse(monsters)
+        names = list(plots.FIGURES)
+        self._render(names)
+        self._save()
+        return names
+
+    def update_raw(self) -> list:
+        """
+        Re-reads the raw data and refreshes the rows and figures affected
+        by the changes since the last update.
+
+        Returns
+        -------
+        list
+            The names of the rendered figures.
+        """
+        self._check_store()
+        monsters = self._load()
+        old_pos = {key: i for i, key in enumerate(self.keys)}
+        keys = [_block_key(m) if isinstance(m, dict) else None
+                for m in monsters]
+        # Only blocks that are not already in the data need validation.
+        # Rejected blocks are never stored, so they are re-checked (and kept
+        # in the report) on every update.
+        kept = self._validate(monsters, keys, [
+            i for i, key in enumerate(keys) if key not in old_pos])
+        monsters = [monsters[i] for i in kept]
+        keys = [keys[i] for i in kept]
+        new_pos = [i for i, key in enumerate(keys) if key not in old_pos]
+        new_pos_set = set(new_pos)
+        parsed = self._parse([monsters[i] for i in new_pos])
+
+        unchanged_order = all(
+            k == self.keys[i] for i, k in enumerate(keys)
+            if i not in new_pos_set)
+        if len(keys) == len(self.keys) and unchanged_order:
+            # Only some blocks changed in place: update those rows
+            old_rows = self.df.loc[new_pos, COLUMNS].reset_index(
+                drop=True)
+            diff = old_rows.ne(parsed[COLUMNS])
+            columns = {c for c in COLUMNS if diff[c].any()}
+            for c in parsed.columns:
+                self.df.loc[new_pos, c] = parsed[c].to_numpy()
+            names = plots.affected_figures(columns)
+            names_changed = "Name" in columns
+            # Columns that no figure reads (e.g. the speeds) still go to
+            # the processed data
+            data_changed = bool(columns)
+        else:
+            # Monsters were added, removed or reordered: reuse the rows of
+            # the unchanged blocks and rebuild the data frame
+            n_old = len(self.keys)
+            new_index = {i: n_old + j for j, i in enumerate(new_pos)}
+            take = [new_index[i] if i in new_index else old_pos[key]
+                    for i, key in enumerate(keys)]
+            if new_pos:
+                self.df = pd.concat([self.df, parsed], ignore_index=True)
+            self.df = self.df.iloc[take].reset_index(drop=True)
+            names = list(plots.FIGURES)
+            names_changed = True
+            data_changed = True
+
+        self.keys = keys
+        self._render(names)
+        if data_changed:
+            self._save(names_changed)
+        return names
+
+    def update_settings(self) -> list:
+        """
+        Reloads `config.py` and `colors.py`, re-validates the raw data,
+        recomputes the auxiliary columns and renders all the figures. If
+        the new settings change which blocks are valid (e.g. a new
+        Challenge Rating), all the monsters are processed again.
+
+        Returns
+        -------
+        list
+            The names of the rendered figures.
+        """
+        for module in (config, colors, validation, data, plots):
+            importlib.reload(module)
+        monsters = self._load()
+        keys = [_block_key(m) if isinstance(m, dict) else None
+                for m in monsters]
+        kept = self._validate(monsters, keys, range(len(monsters)))
+        if [keys[i] for i in kept] != self.keys:
+            return self.build()
+        data.add_derived_columns(self.df)
+        names = list(plots.FIGURES)
+        self._render(names)
+        return names
+
+
+def _mtimes(paths: list) -> dict:
+    return {path: os.stat(path).st_mtime_ns for path in paths}
+
+
+def watch(pipeline: Pipeline, interval: float = 0.2) -> None:
+    """
+    Polls the raw data and the settings files and refreshes the outputs
+    whenever they change.
+
+    Parameters
+    ----------
+    pipeline : Pipeline
+        The pipeline to refresh.
+    interval : float, optional
+        The polling interval in seconds.
+    """
+    paths = [pipeline.raw_path] + SETTINGS_FILES
+    mtimes = _mtimes(paths)
+    start = time.perf_counter()
+    names = pipeline.build()
+    print(f"Rendered {len(names)} figures in "
+          f"{time.perf_counter() - start:.2f} s. Watching for changes...")
+    while True:
+        time.sleep(interval)
+        try:
+            new_mtimes = _mtimes(paths)
+        except OSError:
+            # Some editors briefly remove a file while saving it
+            continue
+        changed = [p for p in paths if new_mtimes[p] != mtimes[p]]
+        mtimes = new_mtimes
+        if not changed:
+            continue
+        start = time.perf_counter()
+        try:
+            if any(p in SETTINGS_FILES for p in changed):
+                names = pipeline.update_settings()
+            else:
+                names = pipeline.update_raw()
+        except (OSError, ValueError, KeyError, IndexError,
+                SyntaxError) as e:
+            # Usually a file caught halfway through being saved
+            print(f"Skipping update: {e!r}", file=sys.stderr)
+            continue
+        print(f"Rendered {names or 'no figures'} in "
+              f"{time.perf_counter() - start:.2f} s.")
+
+
+if __name__ == "__main__":
+    watch(Pipeline())